@@ -0,0 +1,146 @@
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from sqlalchemy import func, select
+
+from database import DailyProgress, Profile, TimeBreakdown, db
+from queries import QueryError
+
+PERIODS = ("day", "week")
+NPT = "NPT"
+
+
+def parse_period(value):
+    period = value or "day"
+    if period not in PERIODS:
+        raise QueryError(f"period must be one of {', '.join(PERIODS)}")
+    return period
+
+
+def _period_start(day, period):
+    # Weeks start on Monday
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+
+def _days(first, last):
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def _filtered(query, model, well_pad_name=None, date_from=None, date_to=None):
+    if well_pad_name:
+        query = query.where(model.well_pad_name == well_pad_name)
+    if date_from:
+        query = query.where(model.date >= date_from)
+    if date_to:
+        query = query.where(model.date <= date_to)
+    return query
+
+
+def _by_well_pad(rows):
+    for well_pad_name, group in groupby(rows, key=lambda row: row.well_pad_name):
+        yield well_pad_name, list(group)
+
+
+def depth_curve(well_pad_name=None, date_from=None, date_to=None):
+    """
+    Depth against time for each well pad, one point per activity.
+
+    Timestamps are the report date plus the activity start hour. Days without
+    a report get one point at midnight with no depth, so the curve shows the
+    gap, as the dashboard's preprocessing used to do.
+    """
+    query = _filtered(
+        select(Profile.well_pad_name, Profile.date, TimeBreakdown.start, TimeBreakdown.depth, TimeBreakdown.description)
+        .join_from(TimeBreakdown, Profile, TimeBreakdown.profile_id == Profile.id)
+        .where(Profile.date.is_not(None)),
+        Profile, well_pad_name, date_from, date_to,
+    ).order_by(Profile.well_pad_name, Profile.date, TimeBreakdown.start)
+
+    points = []
+    for well_pad, rows in _by_well_pad(db.session.execute(query)):
+        reported = {row.date for row in rows}
+        gaps = [
+            (day, None, None, None)
+            for day in _days(rows[0].date, rows[-1].date) if day not in reported
+        ]
+        for day, start, depth, description in sorted(
+            [(row.date, row.start, row.depth, row.description) for row in rows] + gaps,
+            key=lambda point: (point[0], point[1] or 0),
+        ):
+            points.append({
+                "well_pad_name": well_pad,
+                "time": (datetime.combine(day, time()) + timedelta(hours=start or 0)).isoformat(),
+                "depth": depth,
+                "description": description,
+            })
+    return points
+
+
+def daily_progress(well_pad_name=None, date_from=None, date_to=None):
+    """
+    Depth progress per well pad and calendar day, from the daily_progress table.
+
+    Days without a report are filled in with no progress, so a chart of the
+    result keeps one bar per day.
+    """
+    query = _filtered(
+        select(DailyProgress.well_pad_name, DailyProgress.date, DailyProgress.progress, DailyProgress.activities),
+        DailyProgress, well_pad_name, date_from, date_to,
+    ).order_by(DailyProgress.well_pad_name, DailyProgress.date)
+
+    days = []
+    for well_pad, rows in _by_well_pad(db.session.execute(query)):
+        by_date = {row.date: row for row in rows}
+        for day in _days(rows[0].date, rows[-1].date):
+            row = by_date.get(day)
+            days.append({
+                "well_pad_name": well_pad,
+                "date": day.isoformat(),
+                "progress": row.progress if row else 0.0,
+                "activities": row.activities if row else 0,
+            })
+    return days
+
+
+def _category():
+    # PT/NPT as written on the report, normalized; blank cells have no category
+    return func.nullif(func.upper(func.trim(TimeBreakdown.pt_npt)), "")
+
+
+def _hours(group_columns, well_pad_name, date_from, date_to, where=None):
+    """SUM(elapsed) per report date and `group_columns`, over the filtered reports."""
+    query = _filtered(
+        select(Profile.date, *group_columns, func.sum(TimeBreakdown.elapsed).label("hours"))
+        .join_from(TimeBreakdown, Profile, TimeBreakdown.profile_id == Profile.id)
+        .where(Profile.date.is_not(None)),
+        Profile, well_pad_name, date_from, date_to,
+    )
+    if where is not None:
+        query = query.where(where)
+    return db.session.execute(query.group_by(Profile.date, *group_columns)).all()
+
+
+def _rollup(rows, period, key_names):
+    """Sum per-day hours into periods; returns sorted dicts with `period_start`."""
+    totals = {}
+    for row in rows:
+        key = (_period_start(row[0], period),) + tuple(row[1:-1])
+        totals[key] = totals.get(key, 0.0) + (row[-1] or 0.0)
+    return [
+        dict(zip(key_names, key[1:]), period_start=key[0].isoformat(), hours=round(hours, 4))
+        for key, hours in sorted(totals.items(), key=lambda item: tuple("" if part is None else part for part in item[0]))
+    ]
+
+
+def pt_npt_hours(well_pad_name=None, date_from=None, date_to=None, period="day"):
+    """Productive (PT) and non-productive (NPT) hours per day or week."""
+    category = _category().label("category")
+    rows = _hours([category], well_pad_name, date_from, date_to)
+    return _rollup(rows, period, ["category"])
+
+
+def npt_hours_by_code(well_pad_name=None, date_from=None, date_to=None, period="day"):
+    """Non-productive hours per activity code, per day or week."""
+    code = func.nullif(func.trim(TimeBreakdown.code), "").label("code")
+    rows = _hours([code], well_pad_name, date_from, date_to, where=_category() == NPT)
+    return _rollup(rows, period, ["code"])
@@ -1,23 +1,37 @@
 import os
-import hashlib
-import camelot
-from flask import Flask, request, jsonify
+import uuid
+from datetime import datetime
+from flask import Flask, Response, request, jsonify
 from werkzeug.utils import secure_filename
-from sqlalchemy.sql import text
 from dotenv import load_dotenv
 
-from database import (
-    Profile,
-    GeneralData,
-    DrillingParameter,
-    AFE,
-    PersonnelInCharge,
-    Summary,
-    TimeBreakdown,
-    db,
+import analytics
+from database import DailyProgress, Profile, db
+from formats import columnar_response, requested_format, to_arrow
+from claims import claim_upload, release_uploads
+from ingest import CLAIM_MESSAGES, MESSAGE_IN_PROGRESS, calculate_file_hash
+from jobs import JobQueue, FINISHED
+from metrics import BYTES_UPLOADED, FAILURES, FILES_PROCESSED, REGISTRY, STAGE_SECONDS
+from queries import (
+    KEY_COLUMNS,
+    QueryError,
+    catalog_query,
+    decode_cursor,
+    decode_report_cursor,
+    detail_query,
+    encode_cursor,
+    encode_report_cursor,
+    parse_columns,
+    report_page_query,
+    report_time_query,
+    time_breakdown_query,
 )
-
-from ocr import cleaning_drilling_report_1
+from reextract import ReextractRuns
+from response_cache import ResponseCache, cached
+from schema import upgrade_schema
+from streaming import json_array, json_object, stream_response, stream_rows
+from table_cache import TableCache
+from uploads import ChunkedUploads, UploadError
 from flask_cors import CORS
 load_dotenv()
 
@@ -25,13 +39,47 @@ app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = os.getenv("UPLOAD_FOLDER", "./data/uploaded_files")
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-CORS(app)
+app.config["REPORT_TEMPLATE"] = os.getenv(
+    "REPORT_TEMPLATE",
+    os.path.join(app.config["UPLOAD_FOLDER"], "templates", "drilling_report_1.json"),
+)
+# Number of API worker processes (gunicorn also reads WEB_CONCURRENCY as its default --workers).
+# Each one runs its own parse pool, so by default the cores are split between them.
+app.config["WEB_CONCURRENCY"] = max(int(os.getenv("WEB_CONCURRENCY", 1)), 1)
+app.config["INGEST_WORKERS"] = int(
+    os.getenv("INGEST_WORKERS", max((os.cpu_count() or 1) // app.config["WEB_CONCURRENCY"], 1))
+)
+app.config["MAX_UPLOAD_SIZE"] = int(os.getenv("MAX_UPLOAD_SIZE", 512 * 1024 * 1024))
+app.config["TABLE_CACHE_FOLDER"] = os.getenv(
+    "TABLE_CACHE_FOLDER", os.path.join(app.config["UPLOAD_FOLDER"], ".table_cache")
+)
+app.config["TABLE_CACHE_MAX_BYTES"] = int(os.getenv("TABLE_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+app.config["ADMIN_TOKEN"] = os.getenv("ADMIN_TOKEN")
+app.config["RESPONSE_CACHE_MAX_BYTES"] = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Streamed responses are buffered per request while they are sent; larger ones are not cached
+app.config["RESPONSE_CACHE_MAX_STREAM_BYTES"] = int(os.getenv("RESPONSE_CACHE_MAX_STREAM_BYTES", 4 * 1024 * 1024))
+CORS(app, expose_headers=["X-Next-Cursor", "ETag"])
+
+# Rows per /time_breakdown page
+DEFAULT_PAGE_SIZE = 5000
+MAX_PAGE_SIZE = 50000
+# Reports per /detail page
+DEFAULT_DETAIL_PAGE_SIZE = 500
+MAX_DETAIL_PAGE_SIZE = 5000
 
 db.init_app(app)
 
-def calculate_hash(data_dict):
-    data_string = "".join(str(value) for value in data_dict.values())
-    return hashlib.md5(data_string.encode()).hexdigest()
+table_cache = TableCache(app.config["TABLE_CACHE_FOLDER"], app.config["TABLE_CACHE_MAX_BYTES"])
+job_queue = JobQueue(app, max_workers=app.config["INGEST_WORKERS"], table_cache=table_cache)
+reextract_runs = ReextractRuns(app, table_cache=table_cache)
+chunked_uploads = ChunkedUploads(app.config["UPLOAD_FOLDER"], app.config["MAX_UPLOAD_SIZE"])
+response_cache = ResponseCache(
+    app.config["RESPONSE_CACHE_MAX_BYTES"], max_stream_bytes=app.config["RESPONSE_CACHE_MAX_STREAM_BYTES"]
+)
+
+def is_true(value):
+    """Boolean flags arrive as JSON booleans or as form/query strings."""
+    return value is True or str(value).lower() in ("1", "true", "yes")
 
 def init_db(app):
     db.init_app(app)
@@ -40,6 +88,14 @@ def init_db(app):
 
 @app.route("/upload", methods=["POST"])
 def upload_pdfs():
+    """
+    Stores the uploaded PDFs and queues one ingestion job per file.
+
+    Parsing happens in the background; poll /jobs/<job_id> or
+    /batches/<batch_id> for the per-file result messages. Send revise=1 (form
+    field or query parameter) to replace already stored reports with the
+    uploaded revisions instead of rejecting them.
+    """
     if "files" not in request.files:
         return jsonify({"message": "No file part in the request"}), 400
 
@@ -47,177 +103,515 @@ def upload_pdfs():
     if not files or all(file.filename == "" for file in files):
         return jsonify({"message": "No files selected"}), 400
 
+    batch_id = uuid.uuid4().hex
+    revise = is_true(request.form.get("revise") or request.args.get("revise"))
     results = []
+    batch_hashes = set()
     for file in files:
         if file and file.filename.endswith(".pdf"):
+            claimed_hash = None
             try:
-                # Process each file
-                file_path = os.path.join(
-                    app.config["UPLOAD_FOLDER"], secure_filename(file.filename)
-                )
-                os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)  # Ensure folder exists
-                file.save(file_path)
-
-                # Extract tables from the uploaded PDF using Camelot
-                tables = camelot.read_pdf(file_path)
-
-                if len(tables) == 0:
-                    results.append(
-                        {"filename": file.filename, "message": "No tables found"}
-                    )
-                    continue
+                # Byte-identical files are answered from the upload index without saving or parsing
+                with STAGE_SECONDS.time(stage="upload_hash"):
+                    content_hash = calculate_file_hash(file.stream)
+                BYTES_UPLOADED.inc(file.stream.seek(0, os.SEEK_END), route="upload")
+                file.stream.seek(0)
 
-                (
-                    profile,
-                    general,
-                    drilling_parameter,
-                    afe,
-                    personnel_in_charge,
-                    summary,
-                    time_breakdown,
-                ) = cleaning_drilling_report_1(tables[0].df)
-
-                time_breakdown = {i: entry for i, entry in enumerate(time_breakdown)}
-
-                unique_hash = calculate_hash(profile)
-                existing_profile = Profile.query.filter_by(unique_hash=unique_hash).first()
-                if existing_profile:
-                    results.append(
-                        {
-                            "filename": file.filename,
-                            "message": "Data already exists in the database. Upload canceled.",
-                        }
-                    )
+                # Claim the bytes atomically, so concurrent workers never parse the same file twice
+                message = MESSAGE_IN_PROGRESS if content_hash in batch_hashes else None
+                if message is None:
+                    with STAGE_SECONDS.time(stage="upload_claim"):
+                        message = CLAIM_MESSAGES.get(claim_upload(content_hash, file.filename))
+                if message:
+                    FILES_PROCESSED.inc(status="duplicate")
+                    results.append({"filename": file.filename, "status": "done", "message": message})
                     continue
+                claimed_hash = content_hash
+                batch_hashes.add(content_hash)
 
-                # Save the extracted data into the database
-                profile_data = Profile(**profile, unique_hash=unique_hash)
-                db.session.add(profile_data)
-                db.session.commit()
-
-                general_data = GeneralData(**general, profile_id=profile_data.id)
-                drilling_data = DrillingParameter(
-                    **drilling_parameter, profile_id=profile_data.id
-                )
-                afe_data = AFE(**afe, profile_id=profile_data.id)
-                personnel_data = PersonnelInCharge(
-                    **personnel_in_charge, profile_id=profile_data.id
+                # Prefix with a random id so queued files with the same name don't overwrite each other
+                file_path = os.path.join(
+                    app.config["UPLOAD_FOLDER"],
+                    f"{uuid.uuid4().hex}_{secure_filename(file.filename)}",
                 )
-                summary_data = Summary(**summary, profile_id=profile_data.id)
-
-                for item in time_breakdown.values():
-                    time_breakdown_data = TimeBreakdown(
-                        start=item["start"],
-                        end=item["end"],
-                        elapsed=item["elapsed"],
-                        depth=item["depth"],
-                        pt_npt=item["pt_npt"],
-                        code=item["code"],
-                        description=item["description"],
-                        operation=item["operation"],
-                        profile_id=profile_data.id,  # Link to the profile_id
-                    )
-                    db.session.add(time_breakdown_data)
-
-                db.session.add(general_data)
-                db.session.add(drilling_data)
-                db.session.add(afe_data)
-                db.session.add(personnel_data)
-                db.session.add(summary_data)
-                db.session.commit()
+                os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)  # Ensure folder exists
+                with STAGE_SECONDS.time(stage="upload_save"):
+                    file.save(file_path)
 
-                results.append(
-                    {"filename": file.filename, "message": "File processed successfully"}
+                job = job_queue.submit(
+                    file_path, file.filename, batch_id=batch_id, content_hash=content_hash, revise=revise
                 )
+                results.append(job)
 
             except Exception as e:
-                db.session.rollback()
+                if claimed_hash:
+                    release_uploads([claimed_hash])
+                FAILURES.inc(reason="upload_error")
+                FILES_PROCESSED.inc(status="failed")
                 results.append(
-                    {"filename": file.filename, "message": f"Failed to process: {str(e)}"}
+                    {"filename": file.filename, "status": "failed", "message": f"Failed to process: {str(e)}"}
                 )
         else:
+            FAILURES.inc(reason="invalid_file_type")
+            FILES_PROCESSED.inc(status="failed")
             results.append(
-                {"filename": file.filename, "message": "Invalid file type, not a PDF"}
+                {"filename": file.filename, "status": "failed", "message": "Invalid file type, not a PDF"}
             )
 
-    return jsonify({"results": results}), 207
+    return jsonify({"batch_id": batch_id, "results": results}), 202
+
+@app.route("/uploads", methods=["POST"])
+def init_chunked_upload():
+    """
+    Starts a resumable chunked upload.
+
+    Expects JSON with the PDF's "filename" and total "size" in bytes. Send the
+    bytes with PUT /uploads/<upload_id>?offset=N, then POST
+    /uploads/<upload_id>/complete to queue the file for ingestion.
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        state = chunked_uploads.init(body.get("filename"), body.get("size"))
+    except UploadError as e:
+        return jsonify({"message": e.message, **e.details}), e.status
+
+    return jsonify(state), 201
+
+@app.route("/uploads/<upload_id>", methods=["GET"])
+def get_chunked_upload(upload_id):
+    """
+    Returns the bytes received so far, so an interrupted client can resume.
+    """
+    try:
+        return jsonify(chunked_uploads.status(upload_id)), 200
+    except UploadError as e:
+        return jsonify({"message": e.message, **e.details}), e.status
+
+@app.route("/uploads/<upload_id>", methods=["PUT"])
+def append_chunk(upload_id):
+    """
+    Appends the raw request body at the given offset, streaming it to disk.
+    """
+    offset = request.args.get("offset", type=int)
+    if offset is None:
+        return jsonify({"message": "An offset query parameter is required"}), 400
+
+    try:
+        state = chunked_uploads.append(upload_id, offset, request.stream)
+    except UploadError as e:
+        return jsonify({"message": e.message, **e.details}), e.status
+
+    BYTES_UPLOADED.inc(state["offset"] - offset, route="uploads")
+    return jsonify(state), 200
+
+@app.route("/uploads/<upload_id>", methods=["DELETE"])
+def discard_chunked_upload(upload_id):
+    try:
+        chunked_uploads.discard(upload_id)
+    except UploadError as e:
+        return jsonify({"message": e.message, **e.details}), e.status
+
+    return "", 204
+
+@app.route("/uploads/<upload_id>/complete", methods=["POST"])
+def complete_chunked_upload(upload_id):
+    """
+    Finalizes a fully received upload and queues it for ingestion.
+
+    An optional "batch_id" in the JSON body groups several files so they can
+    be polled together through /batches/<batch_id>. Set "revise" to true to
+    replace an already stored report with this revision.
+    """
+    body = request.get_json(silent=True) or {}
+    batch_id = body.get("batch_id") or uuid.uuid4().hex
+
+    try:
+        filename, file_path = chunked_uploads.finalize(upload_id)
+    except UploadError as e:
+        return jsonify({"message": e.message, **e.details}), e.status
+
+    with STAGE_SECONDS.time(stage="upload_hash"), open(file_path, "rb") as f:
+        content_hash = calculate_file_hash(f)
+
+    with STAGE_SECONDS.time(stage="upload_claim"):
+        message = CLAIM_MESSAGES.get(claim_upload(content_hash, filename))
+    if message:
+        FILES_PROCESSED.inc(status="duplicate")
+        os.remove(file_path)
+        return jsonify(
+            {"filename": filename, "batch_id": batch_id, "status": "done", "message": message}
+        ), 200
+
+    job = job_queue.submit(
+        file_path, filename, batch_id=batch_id, content_hash=content_hash, revise=is_true(body.get("revise"))
+    )
+    return jsonify(job), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Returns the status (queued/running/done/failed) and result message of one ingestion job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+
+    return jsonify(job), 200
+
+@app.route("/batches/<batch_id>", methods=["GET"])
+def get_batch(batch_id):
+    """
+    Returns the status of every job created by one /upload request.
+    """
+    jobs = job_queue.get_batch(batch_id)
+    if not jobs:
+        return jsonify({"message": "Batch not found"}), 404
+
+    return jsonify({
+        "batch_id": batch_id,
+        "finished": all(job["status"] in FINISHED for job in jobs),
+        "results": jobs,
+    }), 200
+
+def admin_forbidden():
+    """Admin routes require the X-Admin-Token header when ADMIN_TOKEN is configured."""
+    token = app.config.get("ADMIN_TOKEN")
+    return bool(token) and request.headers.get("X-Admin-Token") != token
+
+@app.route("/admin/reextract", methods=["POST"])
+def start_reextract():
+    """
+    Re-runs the cleaning over stored reports and writes only the rows that changed.
+
+    Optional JSON filters: "well_pad_name", "date_from", "date_to" (YYYY-MM-DD)
+    and "profile_ids". Runs in the background; poll /admin/reextract/<run_id>
+    for progress and throughput.
+    """
+    if admin_forbidden():
+        return jsonify({"message": "Forbidden"}), 403
+
+    body = request.get_json(silent=True) or {}
+    filters = {
+        key: body[key]
+        for key in ("well_pad_name", "date_from", "date_to", "profile_ids")
+        if body.get(key)
+    }
+    run = reextract_runs.start(
+        filters,
+        workers=body.get("workers") or app.config["INGEST_WORKERS"],
+        batch_size=body.get("batch_size") or 50,
+    )
+    return jsonify(run), 202
+
+@app.route("/admin/reextract/<run_id>", methods=["GET"])
+def get_reextract(run_id):
+    if admin_forbidden():
+        return jsonify({"message": "Forbidden"}), 403
+
+    run = reextract_runs.get(run_id)
+    if run is None:
+        return jsonify({"message": "Run not found"}), 404
+
+    return jsonify(run), 200
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Ingestion stage timings and counters in the Prometheus text format.
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+def date_arg(name):
+    """Optional YYYY-MM-DD query parameter as a date; raises ValueError when malformed."""
+    value = request.args.get(name)
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+@app.route("/catalog", methods=["GET"])
+@cached(response_cache)
+def get_catalog():
+    """
+    What data there is, for building filters: whether any report is stored,
+    and each well pad with its date range, report count and activity count.
+    """
+    try:
+        well_pads = [
+            {
+                "well_pad_name": row.well_pad_name,
+                "date_min": row.date_min.isoformat() if row.date_min else None,
+                "date_max": row.date_max.isoformat() if row.date_max else None,
+                "reports": row.reports,
+                "rows": int(row.activities),
+            }
+            for row in db.session.execute(catalog_query())
+        ]
+        return jsonify({"has_data": bool(well_pads), "well_pads": well_pads}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/daily_progress", methods=["GET"])
+@cached(response_cache)
+def get_daily_progress():
+    """
+    Depth progress per day, one row per well pad and date, ordered by date.
+
+    Optional query parameters: well_pad_name, date_from and date_to (YYYY-MM-DD).
+    """
+    try:
+        date_from, date_to = date_arg("date_from"), date_arg("date_to")
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+
+    try:
+        query = DailyProgress.query
+        if request.args.get("well_pad_name"):
+            query = query.filter(DailyProgress.well_pad_name == request.args["well_pad_name"])
+        if date_from:
+            query = query.filter(DailyProgress.date >= date_from)
+        if date_to:
+            query = query.filter(DailyProgress.date <= date_to)
+
+        days = [
+            {
+                "well_pad_name": day.well_pad_name,
+                "date": day.date.isoformat(),
+                "first_depth": day.first_depth,
+                "last_depth": day.last_depth,
+                "progress": day.progress,
+                "activities": day.activities,
+            }
+            for day in query.order_by(DailyProgress.date, DailyProgress.well_pad_name)
+        ]
+        return jsonify(days), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def analytics_filters():
+    """well_pad_name, date_from and date_to of an /analytics request; raises ValueError on bad dates."""
+    return {
+        "well_pad_name": request.args.get("well_pad_name"),
+        "date_from": date_arg("date_from"),
+        "date_to": date_arg("date_to"),
+    }
+
+@app.route("/analytics/depth_curve", methods=["GET"])
+@cached(response_cache)
+def get_depth_curve():
+    """
+    Depth against time per well pad: {well_pad_name, time, depth, description}.
+
+    Optional query parameters: well_pad_name, date_from and date_to (YYYY-MM-DD).
+    """
+    try:
+        filters = analytics_filters()
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+
+    try:
+        return jsonify(analytics.depth_curve(**filters)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/analytics/daily_progress", methods=["GET"])
+@cached(response_cache)
+def get_daily_progress_analytics():
+    """
+    Depth progress per well pad and calendar day, with days without a report
+    filled in: {well_pad_name, date, progress, activities}.
+
+    Optional query parameters: well_pad_name, date_from and date_to (YYYY-MM-DD).
+    """
+    try:
+        filters = analytics_filters()
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+
+    try:
+        return jsonify(analytics.daily_progress(**filters)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/analytics/pt_npt_hours", methods=["GET"])
+@cached(response_cache)
+def get_pt_npt_hours():
+    """
+    PT and NPT hours per period: {period_start, category, hours}.
+
+    Optional query parameters: well_pad_name, date_from, date_to (YYYY-MM-DD)
+    and period (day or week, default day).
+    """
+    try:
+        filters = analytics_filters()
+        period = analytics.parse_period(request.args.get("period"))
+    except QueryError as e:
+        return jsonify({"message": str(e)}), 400
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+
+    try:
+        return jsonify(analytics.pt_npt_hours(**filters, period=period)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/analytics/npt_by_code", methods=["GET"])
+@cached(response_cache)
+def get_npt_by_code():
+    """
+    NPT hours per activity code and period: {period_start, code, hours}.
+
+    Optional query parameters: well_pad_name, date_from, date_to (YYYY-MM-DD)
+    and period (day or week, default day).
+    """
+    try:
+        filters = analytics_filters()
+        period = analytics.parse_period(request.args.get("period"))
+    except QueryError as e:
+        return jsonify({"message": str(e)}), 400
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+
+    try:
+        return jsonify(analytics.npt_hours_by_code(**filters, period=period)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/time_breakdown', methods=['GET'])
+@cached(response_cache)
 def get_time_breakdown():
     """
-    Fetches all records from the time_breakdown table ordered by profile_id and start.
-    """
-    try:
-        # Execute the SQL query
-        query = text("""
-            SELECT 
-                tb.profile_id, 
-                tb.start, 
-                tb.end, 
-                tb.elapsed, 
-                tb.depth,
-                tb.description, 
-                pf.date, 
-                pf.well_pad_name
-            FROM time_breakdown tb
-            INNER JOIN profile pf
-            ON tb.profile_id = pf.id
-            ORDER BY pf.date, tb.start ASC;
-        """)
-        result = db.session.execute(query)
-
-        # Convert result to a list of dictionaries
-        time_breakdown = [
-            dict(row._mapping) for row in result
-        ]
+    Fetches time_breakdown records joined with their report's date and well pad,
+    ordered by date, profile_id and start.
+
+    Optional query parameters:
+    - well_pad_name, date_from, date_to (YYYY-MM-DD): filters.
+    - columns: comma-separated columns to return (see queries.TIME_BREAKDOWN_COLUMNS).
+    - limit: page size, up to MAX_PAGE_SIZE.
+    - cursor: the X-Next-Cursor header of the previous page.
+
+    The response is one page, as a JSON array by default, or as an Arrow IPC
+    stream or Parquet file when asked for with `format=arrow|parquet` or the
+    Accept header. When more rows follow, the X-Next-Cursor response header
+    holds the cursor of the next page.
+    """
+    try:
+        fmt = requested_format()
+        date_from, date_to = date_arg("date_from"), date_arg("date_to")
+        columns = parse_columns(request.args.get("columns"))
+        after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except QueryError as e:
+        return jsonify({"message": str(e)}), 400
+    except ValueError:
+        return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+    limit = min(max(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+    try:
+        filters = {"well_pad_name": request.args.get("well_pad_name"), "date_from": date_from, "date_to": date_to}
+        query = time_breakdown_query(**filters, columns=columns, after=after, limit=limit)
+
+        # The cursor header goes out before the streamed rows, so look it up
+        # first: the key of the page's last row, if another row follows it
+        lookahead = time_breakdown_query(**filters, columns=KEY_COLUMNS, after=after, limit=2).offset(limit - 1)
+        keys = db.session.execute(lookahead).all()
+
+        if fmt == "json":
+            rows = stream_rows(query)
+            response = stream_response(json_array(rows, lambda row: {name: row._mapping[name] for name in columns}))
+        else:
+            table = to_arrow(query.selected_columns, db.session.execute(query).all()).select(columns)
+            response = columnar_response(table, fmt)
+        if len(keys) > 1:
+            response.headers["X-Next-Cursor"] = encode_cursor(keys[0]._mapping)
+        response.vary.add("Accept")
+        return response, 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        return jsonify(time_breakdown), 200
+def report_detail(**filters):
+    """
+    Response with the detail and time breakdown of the reports matching `filters`.
+
+    JSON holds both tables and is streamed; Arrow and Parquet hold the one
+    named by the `table` query parameter (detail or time, default time).
+    """
+    try:
+        fmt = requested_format()
+        table = request.args.get("table", "time")
+        if table not in ("detail", "time"):
+            raise QueryError("table must be detail or time")
+    except QueryError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        queries = {"detail": detail_query(**filters), "time": report_time_query(**filters)}
+        if fmt == "json":
+            # Both statements run before streaming starts, each on its own cursor
+            results = {name: stream_rows(query) for name, query in queries.items()}
+            response = stream_response(json_object({name: json_array(rows) for name, rows in results.items()}))
+        else:
+            query = queries[table]
+            response = columnar_response(to_arrow(query.selected_columns, db.session.execute(query).all()), fmt)
+        response.vary.add("Accept")
+        return response, 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
+# Profile ids embed the free-text well pad name, which may contain "/"
+@app.route('/detail/<path:profile_id>', methods=['GET'])
+@cached(response_cache)
+def get_report_detail(profile_id):
+    """
+    Returns the detail and time breakdown of a single report.
+    """
+    try:
+        if db.session.get(Profile, profile_id) is None:
+            return jsonify({"message": "Report not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return report_detail(profile_id=profile_id)
 
 @app.route('/detail', methods=['GET'])
+@cached(response_cache)
 def get_detail_report():
+    """
+    Returns report details and their time breakdown.
+
+    With well_pad_name and date (YYYY-MM-DD), only the reports of that well
+    pad on that day are returned. Without them, the reports are paged in id
+    order: `limit` reports per page, up to MAX_DETAIL_PAGE_SIZE, and the
+    X-Next-Cursor response header holds the `cursor` of the next page, as for
+    /time_breakdown. Supports the same formats as /time_breakdown (see
+    report_detail).
+    """
+    if request.args.get("well_pad_name") or request.args.get("date"):
+        try:
+            report_date = date_arg("date")
+        except ValueError:
+            return jsonify({"message": "Dates must be formatted as YYYY-MM-DD"}), 400
+        if not request.args.get("well_pad_name") or report_date is None:
+            return jsonify({"message": "Both well_pad_name and date are required"}), 400
+        return report_detail(well_pad_name=request.args["well_pad_name"], report_date=report_date)
+
     try:
-        # Query 1: Fetch data from profile and related tables
-        detail_query = """
-            SELECT 
-                pf.id,  
-                pf.contractor, 
-                pf.report_no, 
-                pf.field, 
-                pf.latitude_longitude,
-                afe.afe_number_afe_cost, 
-                afe.daily_cost,
-                afe.percent_afe_cumulative_cost, 
-                afe.daily_mud_cost, 
-                afe.cumulative_mud_cost,
-                pic.day_night_drilling_supv, 
-                pic.drilling_superintendent, 
-                pic.rig_superintendent, 
-                pic.drilling_engineer, 
-                pic.hse_supervisor,
-                smr.hours_24_summary
-            FROM profile pf
-            INNER JOIN afe ON afe.profile_id = pf.id
-            INNER JOIN personnel_in_charge pic ON pic.profile_id = pf.id
-            INNER JOIN summary smr ON smr.profile_id = pf.id;
-        """
-        detail_result = db.session.execute(text(detail_query))
-        detail = [dict(row._mapping) for row in detail_result]  
-
-        # Query 2: Fetch data from time_breakdown table
-        time_query = "SELECT * FROM time_breakdown;"
-        time_result = db.session.execute(text(time_query))
-        time = [dict(row._mapping) for row in time_result] 
-
-        # Combine the results into a single response
-        return jsonify({"detail": detail, "time": time}), 200
+        after = decode_report_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+    except QueryError as e:
+        return jsonify({"message": str(e)}), 400
+    limit = min(max(request.args.get("limit", DEFAULT_DETAIL_PAGE_SIZE, type=int), 1), MAX_DETAIL_PAGE_SIZE)
 
+    try:
+        # The id of the page's last report, if another report follows it
+        keys = db.session.execute(report_page_query(after, limit=2).offset(limit - 1)).scalars().all()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    response, status = report_detail(after=after, limit=limit)
+    if status == 200 and len(keys) > 1:
+        response.headers["X-Next-Cursor"] = encode_report_cursor(keys[0])
+    return response, status
+
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        upgrade_schema()
     app.run(debug=True)
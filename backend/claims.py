@@ -0,0 +1,123 @@
+"""
+Claims that keep concurrent workers from ingesting the same file or report twice.
+
+Two levels:
+- Upload claims: before a file is parsed, its content hash is inserted into
+  upload_index with status "claimed". The insert is atomic, so when several
+  API workers (or the CLI) receive the same bytes, exactly one parses them.
+  The others answer right away instead of failing after a full parse.
+  Claims are leases: their owner renews them while the file is queued or
+  being parsed, so the claims of a worker that was killed expire after
+  CLAIM_TIMEOUT instead of blocking the file for good.
+- Report locks: save_reports takes a transaction-scoped advisory lock per
+  profile id before checking for stored reports, so different files of the
+  same report are serialized between the check and the insert.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+
+from database import UploadIndex, db, insert_if_missing
+
+CLAIMED = "claimed"
+INDEXED = "done"
+
+# A claim not renewed for this long belongs to a worker that died; another may take it over
+CLAIM_TIMEOUT = timedelta(minutes=5)
+# How often owners renew their claims (see renew_uploads)
+CLAIM_RENEW_INTERVAL = CLAIM_TIMEOUT / 5
+
+
+def claim_upload(content_hash, filename=None):
+    """
+    Claim the processing of a file's bytes.
+
+    Returns None when the caller now owns the claim and should parse the
+    file. Otherwise returns the status of the existing entry: INDEXED when the
+    bytes were already ingested, CLAIMED when another worker is processing
+    them. Commits its own short transaction; must be called inside an
+    application context.
+    """
+    now = datetime.utcnow()
+    try:
+        claimed = insert_if_missing(UploadIndex, {
+            "content_hash": content_hash,
+            "filename": filename,
+            "status": CLAIMED,
+            "claimed_at": now,
+            "created_at": now,
+        })
+        if not claimed:
+            # Take over a stale claim, atomically so only one worker succeeds
+            claimed = db.session.execute(
+                update(UploadIndex)
+                .where(
+                    UploadIndex.content_hash == content_hash,
+                    UploadIndex.status == CLAIMED,
+                    UploadIndex.claimed_at < now - CLAIM_TIMEOUT,
+                )
+                .values(claimed_at=now, filename=filename)
+            ).rowcount == 1
+
+        status = None
+        if not claimed:
+            status = db.session.execute(
+                select(UploadIndex.status).where(UploadIndex.content_hash == content_hash)
+            ).scalar()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if not claimed and status is None:
+        # Released by a failing worker in the meantime; try again
+        return claim_upload(content_hash, filename)
+    return status
+
+
+def release_uploads(content_hashes):
+    """Give up the claims of files that failed to ingest, so they can be uploaded again."""
+    content_hashes = [content_hash for content_hash in content_hashes if content_hash]
+    if not content_hashes:
+        return
+    try:
+        db.session.execute(
+            delete(UploadIndex).where(
+                UploadIndex.content_hash.in_(content_hashes), UploadIndex.status == CLAIMED
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def renew_uploads(content_hashes):
+    """Keep the claims of files that are still queued or being parsed from going stale."""
+    content_hashes = [content_hash for content_hash in content_hashes if content_hash]
+    if not content_hashes:
+        return
+    try:
+        db.session.execute(
+            update(UploadIndex)
+            .where(UploadIndex.content_hash.in_(content_hashes), UploadIndex.status == CLAIMED)
+            .values(claimed_at=datetime.utcnow())
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def lock_reports(profile_ids):
+    """
+    Serialize writers of the same reports until the current transaction ends.
+
+    Uses PostgreSQL advisory transaction locks, taken in sorted order so two
+    batches never deadlock. SQLite already allows a single writer at a time
+    and needs no lock.
+    """
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    for profile_id in sorted(set(profile_ids)):
+        db.session.execute(func.pg_advisory_xact_lock(func.hashtextextended(profile_id, 0)).select())
@@ -0,0 +1,402 @@
+"""
+Command-line ingestion of drilling report PDFs.
+
+    python cli.py backfill /archive/reports --workers 8
+    python cli.py watch /data/drop --interval 10
+    python cli.py reextract --well-pad-name "PAD A" --date-from 2024-01-01
+    python cli.py migrate
+
+The ingestion commands use the same extraction and persistence code as the
+/upload endpoint. Progress is checkpointed to a JSON-lines file (by default
+`.ingest_checkpoint.jsonl` in the scanned directory), so an interrupted run
+picks up where it stopped and the watcher never ingests a file twice. Files
+that another worker is still processing are not checkpointed; the next run
+or scan looks at them again.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app import app, table_cache
+from claims import CLAIM_RENEW_INTERVAL, CLAIMED, claim_upload, release_uploads, renew_uploads
+from daily_progress import rebuild_daily_progress
+from data_version import bump_data_version
+from database import db
+from extraction import extract_report
+from ingest import CLAIM_MESSAGES, calculate_file_hash, save_reports
+from numeric_fields import backfill_numeric_columns
+from reextract import find_sources, reextract as run_reextract
+from schema import upgrade_schema
+
+CHECKPOINT_NAME = ".ingest_checkpoint.jsonl"
+
+
+class Checkpoint:
+    """Append-only record of the files already handled, keyed by path, size and mtime."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A torn last line from an interrupted run
+                    self.entries[entry["path"]] = entry
+
+    def is_done(self, path, stat, retry_failed=False):
+        entry = self.entries.get(path)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            return False
+        return not (retry_failed and entry["status"] == "failed")
+
+    def record(self, results):
+        with open(self.path, "a") as f:
+            for path, stat, status, message in results:
+                entry = {
+                    "path": path,
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "status": status,
+                    "message": message,
+                }
+                self.entries[path] = entry
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def find_pdfs(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(root, name)
+
+
+class Ingestor:
+    """
+    Parses PDFs across a process pool and persists them in batched transactions.
+
+    Results are written to the checkpoint only after their batch is committed.
+    The upload claims of the files being parsed are renewed while the run
+    lasts and released if it is interrupted.
+    """
+
+    def __init__(self, checkpoint, workers, batch_size, retry_failed=False, revise=False, out=sys.stdout):
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.batch_size = batch_size
+        self.retry_failed = retry_failed
+        self.revise = revise
+        self.out = out
+        self.template_path = app.config.get("REPORT_TEMPLATE")
+        self.counts = {"done": 0, "failed": 0, "skipped": 0, "in_progress": 0}
+        self.claimed = set()
+
+    def _log(self, path, message):
+        print(f"{path}: {message}", file=self.out, flush=True)
+
+    def _finish(self, results):
+        self.checkpoint.record(results)
+        for path, _, status, message in results:
+            self.counts[status] += 1
+            self._log(path, message)
+
+    def _flush(self, pending):
+        if not pending:
+            return
+
+        reports = [report for _, _, report in pending]
+        try:
+            with app.app_context():
+                messages = save_reports(reports)
+        except Exception as e:
+            messages = [f"Failed to process: {str(e)}"] * len(reports)
+
+        self._release([
+            report["content_hash"] for report, message in zip(reports, messages) if message.startswith("Failed")
+        ])
+        self.claimed.difference_update(report["content_hash"] for report in reports)
+
+        self._finish([
+            (path, stat, "failed" if message.startswith("Failed") else "done", message)
+            for (path, stat, _), message in zip(pending, messages)
+        ])
+        pending.clear()
+
+    def _release(self, content_hashes):
+        # Failed files are claimed no longer, so a later run or upload retries them
+        content_hashes = list(content_hashes)
+        self.claimed.difference_update(content_hashes)
+        try:
+            with app.app_context():
+                release_uploads(content_hashes)
+        except Exception:
+            pass  # The claims expire after CLAIM_TIMEOUT
+
+    def _renew(self):
+        try:
+            with app.app_context():
+                renew_uploads(self.claimed)
+        except Exception:
+            pass  # Retried on the next interval
+
+    def _prepare(self, path):
+        """Return (stat, content_hash) for a file that still needs parsing, or None."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None  # Removed since it was listed
+
+        if self.checkpoint.is_done(path, stat, self.retry_failed):
+            self.counts["skipped"] += 1
+            return None
+
+        with open(path, "rb") as f:
+            content_hash = calculate_file_hash(f)
+
+        # Same claim as the API takes, so the CLI and the API never parse the same bytes twice
+        with app.app_context():
+            status = claim_upload(content_hash, os.path.basename(path))
+        if status == CLAIMED:
+            # Not checkpointed: if that worker fails, a later run ingests the file
+            self.counts["in_progress"] += 1
+            self._log(path, CLAIM_MESSAGES[status])
+            return None
+        if status:
+            self._finish([(path, stat, "done", CLAIM_MESSAGES[status])])
+            return None
+
+        self.claimed.add(content_hash)
+        return stat, content_hash
+
+    def _ingest(self, paths):
+        paths = iter(paths)
+        pending = []
+        in_flight = {}
+        renewed = time.monotonic()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            def fill():
+                # Keep a bounded number of files in flight so huge archives don't pile up in memory
+                while len(in_flight) < self.workers * 4:
+                    path = next(paths, None)
+                    if path is None:
+                        return
+                    prepared = self._prepare(path)
+                    if prepared is None:
+                        continue
+                    stat, content_hash = prepared
+                    future = pool.submit(
+                        extract_report, path, self.template_path, table_cache, content_hash
+                    )
+                    in_flight[future] = (path, stat, content_hash)
+
+            fill()
+            while in_flight:
+                finished, _ = wait(
+                    in_flight, timeout=CLAIM_RENEW_INTERVAL.total_seconds(), return_when=FIRST_COMPLETED
+                )
+                if time.monotonic() - renewed >= CLAIM_RENEW_INTERVAL.total_seconds():
+                    self._renew()
+                    renewed = time.monotonic()
+
+                for future in finished:
+                    path, stat, content_hash = in_flight.pop(future)
+                    try:
+                        sections = future.result()
+                    except Exception as e:
+                        self._release([content_hash])
+                        self._finish([(path, stat, "failed", f"Failed to process: {str(e)}")])
+                        continue
+
+                    if sections is None:
+                        self._release([content_hash])
+                        self._finish([(path, stat, "failed", "No tables found")])
+                        continue
+
+                    pending.append((path, stat, {
+                        "sections": sections,
+                        "content_hash": content_hash,
+                        "filename": os.path.basename(path),
+                        "file_path": path,
+                        "revise": self.revise,
+                    }))
+
+                if len(pending) >= self.batch_size:
+                    self._flush(pending)
+                fill()
+
+            self._flush(pending)
+
+    def run(self, paths):
+        """Ingest the given files and return the counts of done, failed and skipped files."""
+        started = time.monotonic()
+        try:
+            self._ingest(paths)
+        except KeyboardInterrupt:
+            # Files parsed or stored only in part are claimed no longer, so the next run takes them
+            self._release(list(self.claimed))
+            raise
+
+        elapsed = time.monotonic() - started
+        processed = self.counts["done"] + self.counts["failed"]
+        print(
+            f"{self.counts['done']} done, {self.counts['failed']} failed, "
+            f"{self.counts['skipped']} skipped, {self.counts['in_progress']} in progress elsewhere "
+            f"in {elapsed:.1f}s "
+            f"({processed / elapsed if elapsed else 0:.2f} files/s)",
+            file=self.out,
+            flush=True,
+        )
+        return self.counts
+
+
+def backfill(args):
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(args.directory, CHECKPOINT_NAME))
+    ingestor = Ingestor(
+        checkpoint, args.workers, args.batch_size, retry_failed=args.retry_failed, revise=args.revise
+    )
+    counts = ingestor.run(find_pdfs(args.directory))
+    return 1 if counts["failed"] else 0
+
+
+def watch(args):
+    """Poll the drop folder and ingest PDFs once their size has stopped changing."""
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(args.directory, CHECKPOINT_NAME))
+    ingestor = Ingestor(checkpoint, args.workers, args.batch_size, revise=args.revise)
+    last_seen = {}
+
+    print(f"Watching {args.directory} every {args.interval}s", flush=True)
+    while True:
+        ready = []
+        current = {}
+        for path in find_pdfs(args.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if checkpoint.is_done(path, stat):
+                continue
+
+            signature = (stat.st_size, stat.st_mtime)
+            current[path] = signature
+            # A file still being copied in changes between two scans
+            if last_seen.get(path) == signature:
+                ready.append(path)
+
+        if ready:
+            ingestor.run(ready)
+        last_seen = current
+        time.sleep(args.interval)
+
+
+def reextract(args):
+    """Re-run the cleaning over stored reports after the cleaning rules changed."""
+    def progress(stats):
+        print(
+            f"{stats['processed']}/{stats['total']} reports, "
+            f"{stats['changed_reports']} changed ({stats['changed_rows']} rows), "
+            f"{stats['failed']} failed, {stats['reports_per_second']:.2f} reports/s",
+            flush=True,
+        )
+
+    sources, unindexed = find_sources(
+        well_pad_name=args.well_pad_name,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        profile_ids=args.profile_id,
+        upload_folder=app.config["UPLOAD_FOLDER"],
+    )
+    if unindexed:
+        print(f"{len(unindexed)} reports have no upload index entry; "
+              f"looking for their PDFs in {app.config['UPLOAD_FOLDER']}", flush=True)
+    stats = run_reextract(
+        sources,
+        args.workers,
+        args.batch_size,
+        template_path=app.config.get("REPORT_TEMPLATE"),
+        table_cache=table_cache,
+        progress=progress,
+        unindexed=unindexed,
+    )
+    for error in stats["errors"]:
+        print(f"{error['profile_id']}: {error['message']}", flush=True)
+    if stats["unmatched"]:
+        print(f"{stats['unmatched']} reports without an upload index entry or a matching PDF were skipped",
+              flush=True)
+    return 1 if stats["failed"] else 0
+
+
+def migrate(args):
+    """Fill the derived columns of stored reports (the schema itself is upgraded by main)."""
+    for table, count in backfill_numeric_columns(args.batch_size).items():
+        print(f"{table}: {count} rows backfilled", flush=True)
+    print(f"daily_progress: {rebuild_daily_progress()} days rebuilt", flush=True)
+    bump_data_version()
+    db.session.commit()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest drilling report PDFs without the HTTP API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(subparser):
+        subparser.add_argument("directory", help="Directory of PDFs, scanned recursively")
+        subparser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                               help="Parser processes (default: all cores)")
+        subparser.add_argument("--batch-size", type=int, default=50,
+                               help="Reports persisted per transaction")
+        subparser.add_argument("--checkpoint", help=f"Checkpoint file (default: <directory>/{CHECKPOINT_NAME})")
+        subparser.add_argument("--revise", action="store_true",
+                               help="Replace stored reports with revised versions instead of skipping them")
+
+    backfill_parser = subparsers.add_parser("backfill", help="Ingest a directory tree of historical reports")
+    add_common(backfill_parser)
+    backfill_parser.add_argument("--retry-failed", action="store_true",
+                                 help="Parse files that failed in a previous run again")
+    backfill_parser.set_defaults(func=backfill)
+
+    watch_parser = subparsers.add_parser("watch", help="Ingest new PDFs dropped into a folder")
+    add_common(watch_parser)
+    watch_parser.add_argument("--interval", type=float, default=5.0, help="Seconds between scans")
+    watch_parser.set_defaults(func=watch)
+
+    reextract_parser = subparsers.add_parser("reextract", help="Re-clean stored reports and write what changed")
+    reextract_parser.add_argument("--well-pad-name")
+    reextract_parser.add_argument("--date-from", help="YYYY-MM-DD")
+    reextract_parser.add_argument("--date-to", help="YYYY-MM-DD")
+    reextract_parser.add_argument("--profile-id", action="append", help="Limit to a profile (repeatable)")
+    reextract_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                                  help="Parser processes (default: all cores)")
+    reextract_parser.add_argument("--batch-size", type=int, default=50,
+                                  help="Reports diffed and written per transaction")
+    reextract_parser.set_defaults(func=reextract)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade the schema and backfill derived columns")
+    migrate_parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per transaction")
+    migrate_parser.set_defaults(func=migrate)
+
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        for added in upgrade_schema():
+            print(f"Added {added}", flush=True)
+
+    try:
+        if args.func in (reextract, migrate):
+            with app.app_context():
+                return args.func(args)
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
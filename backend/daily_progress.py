@@ -0,0 +1,81 @@
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import delete, tuple_
+
+from database import DailyProgress, Profile, TimeBreakdown, db, upsert
+
+# (well_pad_name, date) keys recomputed per query
+KEY_CHUNK_SIZE = 500
+
+
+def progress_keys(profile_ids):
+    """The (well_pad_name, date) days the given profiles belong to."""
+    if not profile_ids:
+        return set()
+    return {
+        tuple(key)
+        for key in db.session.query(Profile.well_pad_name, Profile.date)
+        .filter(Profile.id.in_(list(profile_ids)))
+    }
+
+
+def _summarize(depths):
+    # Same rule as the original daily overview: last minus first depth of the
+    # day in start order, 0 when there is a single activity or a depth is missing
+    first_depth, last_depth = depths[0], depths[-1]
+    progress = 0.0
+    if len(depths) > 1 and first_depth is not None and last_depth is not None:
+        progress = last_depth - first_depth
+    return {
+        "first_depth": first_depth,
+        "last_depth": last_depth,
+        "progress": progress,
+        "activities": len(depths),
+    }
+
+
+def refresh_daily_progress(keys):
+    """
+    Recompute the daily_progress rows of the given (well_pad_name, date) days.
+
+    Runs in the caller's transaction and does not commit, so the derived rows
+    change together with the reports they come from. Days left without any
+    activity are removed. Must be called inside an application context.
+    """
+    keys = sorted(key for key in keys if key[0] is not None and key[1] is not None)
+    now = datetime.utcnow()
+
+    for offset in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[offset:offset + KEY_CHUNK_SIZE]
+        activities = (
+            db.session.query(Profile.well_pad_name, Profile.date, TimeBreakdown.start, TimeBreakdown.depth)
+            .join(TimeBreakdown, TimeBreakdown.profile_id == Profile.id)
+            .filter(tuple_(Profile.well_pad_name, Profile.date).in_(chunk))
+            .order_by(Profile.well_pad_name, Profile.date, TimeBreakdown.start, Profile.id)
+            .all()
+        )
+
+        rows = []
+        for (well_pad_name, date), day in groupby(activities, key=lambda row: (row[0], row[1])):
+            summary = _summarize([depth for _, _, _, depth in day])
+            rows.append(dict(summary, well_pad_name=well_pad_name, date=date, updated_at=now))
+
+        empty = set(chunk) - {(row["well_pad_name"], row["date"]) for row in rows}
+        if empty:
+            db.session.execute(
+                delete(DailyProgress).where(
+                    tuple_(DailyProgress.well_pad_name, DailyProgress.date).in_(list(empty))
+                )
+            )
+        if rows:
+            upsert(DailyProgress, rows)
+
+
+def rebuild_daily_progress():
+    """Recompute every day from the stored reports, one chunk per transaction."""
+    keys = [tuple(key) for key in db.session.query(Profile.well_pad_name, Profile.date).distinct()]
+    for offset in range(0, len(keys), KEY_CHUNK_SIZE):
+        refresh_daily_progress(keys[offset:offset + KEY_CHUNK_SIZE])
+        db.session.commit()
+    return len(keys)
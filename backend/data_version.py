@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from database import DataVersion, db, upsert
+
+ROW_ID = 1
+
+
+def current_data_version():
+    """The current data version, 0 before the first change."""
+    return db.session.execute(select(DataVersion.version).where(DataVersion.id == ROW_ID)).scalar() or 0
+
+
+def bump_data_version():
+    """
+    Increment the data version in the caller's transaction.
+
+    Call it right before committing a change to the report data: the row lock
+    it takes is held until the commit, so concurrent writers get distinct,
+    increasing versions.
+    """
+    upsert(
+        DataVersion,
+        [{"id": ROW_ID, "version": 1, "updated_at": datetime.utcnow()}],
+        extra_set={"version": DataVersion.version + 1},
+    )
@@ -1,4 +1,7 @@
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 
 # Initialize the SQLAlchemy instance
 db = SQLAlchemy()
@@ -19,10 +22,23 @@ class Profile(db.Model):
     environment = db.Column(db.String(50))
     gl_msl_m = db.Column(db.Float)
     unique_hash = db.Column(db.String(32), unique=True, nullable=False)
+    # Times the report was replaced by a revised upload
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default=db.text("0"))
+
+    __table_args__ = (
+        db.Index("ix_profile_well_pad_name_date", "well_pad_name", "date"),
+        # Keyset order of /time_breakdown: date, then profile, then time_breakdown's (profile_id, start)
+        db.Index("ix_profile_date_id", "date", "id"),
+    )
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.id = f"{kwargs.get('report_no')}_{kwargs.get('well_pad_name')}"
+        self.id = self.make_id(kwargs.get('report_no'), kwargs.get('well_pad_name'))
+
+    @staticmethod
+    def make_id(report_no, well_pad_name):
+        """Profile ids are derived from the report number and well pad."""
+        return f"{report_no}_{well_pad_name}"
 
 # General Data Model
 class GeneralData(db.Model):
@@ -40,6 +56,15 @@ class GeneralData(db.Model):
     planned_days = db.Column(db.String(255))
     days_from_rig_release = db.Column(db.String(255))
 
+    # Typed copies of the text values above, filled at ingest (see numeric_fields.py)
+    rig_power_num = db.Column(db.Float)
+    kb_elevation_num = db.Column(db.Float)
+    midnight_depth_num = db.Column(db.Float)
+    progress_num = db.Column(db.Float)
+    proposed_td_num = db.Column(db.Float)
+    planned_days_num = db.Column(db.Float)
+    days_from_rig_release_num = db.Column(db.Float)
+
 # Drilling Parameters Model
 class DrillingParameter(db.Model):
     __tablename__ = "drilling_parameters"
@@ -56,6 +81,24 @@ class DrillingParameter(db.Model):
     total_drilling_time = db.Column(db.String(255))
     ton_miles = db.Column(db.String(255))
 
+    # Typed copies of the text values above; fields holding "a / b" are split in two
+    average_wob_24_hrs_num = db.Column(db.Float)
+    average_rop_24_hrs_num = db.Column(db.Float)
+    surface_rpm_num = db.Column(db.Float)
+    dhm_rpm_num = db.Column(db.Float)
+    on_bottom_torque_num = db.Column(db.Float)
+    off_bottom_torque_num = db.Column(db.Float)
+    flowrate_num = db.Column(db.Float)
+    spp_num = db.Column(db.Float)
+    air_rate_num = db.Column(db.Float)
+    corr_inhib_rate_num = db.Column(db.Float)
+    foam_rate_num = db.Column(db.Float)
+    puw_num = db.Column(db.Float)
+    sow_num = db.Column(db.Float)
+    rotw_num = db.Column(db.Float)
+    total_drilling_time_num = db.Column(db.Float)
+    ton_miles_num = db.Column(db.Float)
+
 # AFE Model
 class AFE(db.Model):
     __tablename__ = "afe"
@@ -67,6 +110,13 @@ class AFE(db.Model):
     daily_mud_cost = db.Column(db.String(256))
     cumulative_mud_cost = db.Column(db.String(256))
 
+    # Costs in USD, parsed from the text values above
+    afe_cost_usd = db.Column(db.Numeric(16, 2))
+    daily_cost_usd = db.Column(db.Numeric(16, 2))
+    cumulative_cost_usd = db.Column(db.Numeric(16, 2))
+    daily_mud_cost_usd = db.Column(db.Numeric(16, 2))
+    cumulative_mud_cost_usd = db.Column(db.Numeric(16, 2))
+
 # Personnel In Charge Model
 class PersonnelInCharge(db.Model):
     __tablename__ = "personnel_in_charge"
@@ -101,6 +151,128 @@ class TimeBreakdown(db.Model):
     description = db.Column(db.Text)
     operation = db.Column(db.Text)
 
+    __table_args__ = (
+        # Covers the PT/NPT hour aggregations of /analytics without reading the text columns
+        db.Index("ix_time_breakdown_profile_pt_npt_code", "profile_id", "pt_npt", "code", "elapsed"),
+        # Covers the depth curves of /analytics
+        db.Index("ix_time_breakdown_profile_start_depth", "profile_id", "start", "depth"),
+    )
+
+# Upload Index Model
+class UploadIndex(db.Model):
+    """
+    SHA-256 of every ingested PDF's raw bytes, linked to the profile it produced.
+    Lets /upload recognise byte-identical files without parsing them again.
+
+    A row is inserted with status "claimed" before a file is parsed, so only
+    one worker processes the same bytes (see claims.py). It becomes "done"
+    when the report is saved.
+    """
+    __tablename__ = "upload_index"
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    profile_id = db.Column(db.String(150), db.ForeignKey("profile.id"), index=True)
+    filename = db.Column(db.String(255))
+    file_path = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(16), nullable=False, default="done", server_default=db.text("'done'"))
+    claimed_at = db.Column(db.DateTime)
+
+# Daily Progress Model
+class DailyProgress(db.Model):
+    """
+    Depth progress per well pad and day, derived from the time breakdown.
+
+    Kept up to date in the ingestion transaction (see daily_progress.py), so
+    the daily overview reads one row per day instead of every activity.
+    """
+    __tablename__ = "daily_progress"
+
+    well_pad_name = db.Column(db.String(100), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    first_depth = db.Column(db.Float)
+    last_depth = db.Column(db.Float)
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    activities = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Data Version Model
+class DataVersion(db.Model):
+    """
+    Single-row counter bumped by every transaction that changes report data.
+
+    API responses are cached per version (see response_cache.py), so a new
+    version is all it takes to invalidate them, in every API process.
+    """
+    __tablename__ = "data_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Ingestion Job Model
+class IngestJob(db.Model):
+    """
+    One queued upload and its current status and result message.
+
+    Kept in the database rather than in the memory of the API process that
+    accepted the upload, so /jobs and /batches can be polled through any
+    worker and the results survive a restart (see jobs.py).
+    """
+    __tablename__ = "ingest_job"
+
+    job_id = db.Column(db.String(32), primary_key=True)
+    batch_id = db.Column(db.String(32), index=True)
+    filename = db.Column(db.String(255))
+    content_hash = db.Column(db.String(64))
+    revise = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(16), nullable=False)
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+def _dialect_insert(model):
+    # INSERT with the ON CONFLICT clauses of the two databases the app runs on
+    dialects = {"postgresql": postgresql, "sqlite": sqlite}
+    name = db.session.get_bind().dialect.name
+    if name not in dialects:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {name}")
+    return dialects[name].insert(model)
+
+def insert_if_missing(model, row):
+    """INSERT ... ON CONFLICT DO NOTHING for one row; returns whether it was inserted."""
+    statement = _dialect_insert(model).values(**row).on_conflict_do_nothing()
+    return db.session.execute(statement).rowcount == 1
+
+def upsert(model, rows, extra_set=None, only_changed=False, returning=None):
+    """
+    INSERT ... ON CONFLICT (primary key) DO UPDATE for a list of row dicts.
+
+    `extra_set` adds expressions to the update, such as a counter increment.
+    With `only_changed`, conflicting rows are only rewritten when one of the
+    values differs, so unchanged rows cost no write. `returning` lists columns
+    to return for the rows actually inserted or updated; the result is
+    returned. Supported on PostgreSQL and SQLite, the two databases the app
+    runs on.
+    """
+    statement = _dialect_insert(model)
+    table = model.__table__
+    keys = [column.name for column in table.primary_key.columns]
+    names = [name for name in rows[0] if name not in keys]
+
+    where = None
+    if only_changed and names:
+        where = or_(*(table.c[name].is_distinct_from(statement.excluded[name]) for name in names))
+
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_=dict({name: statement.excluded[name] for name in names}, **(extra_set or {})),
+        where=where,
+    )
+    if returning:
+        statement = statement.returning(*returning)
+    return db.session.execute(statement, rows)
+
 # Database Initialization Function
 def init_db(app):
     """
@@ -0,0 +1,96 @@
+import logging
+
+import camelot
+
+from layout_template import extract_with_template, learn_template, load_template, save_template
+from metrics import Stopwatch
+from ocr import cleaning_drilling_report_1
+
+logger = logging.getLogger(__name__)
+
+# Set once this process failed to learn a template, so it does not retry on every report
+_learning_failed = False
+
+
+def read_table(file_path, template_path=None, table_cache=None, content_hash=None, stopwatch=None):
+    """
+    Return the raw report table as the DataFrame Camelot would produce.
+
+    Checks the table cache first when a content hash is given. Otherwise uses
+    the layout template at template_path when one has been learned and the PDF
+    matches it, and falls back to Camelot lattice detection. Freshly parsed
+    tables are stored in the cache. Returns a (DataFrame, camelot table) pair;
+    the table is None unless Camelot ran. Returns (None, None) when Camelot
+    finds no tables.
+    """
+    stopwatch = stopwatch or Stopwatch()
+
+    if table_cache is not None and content_hash:
+        with stopwatch.stage("table_cache_read"):
+            df = table_cache.get(content_hash)
+        if df is not None:
+            return df, None
+
+    df, table = None, None
+    template = load_template(template_path) if template_path else None
+    if template is not None:
+        try:
+            with stopwatch.stage("template_extract"):
+                df = extract_with_template(file_path, template)
+        except Exception as e:
+            logger.info("Layout template not used for %s: %s", file_path, e)
+
+    if df is None:
+        with stopwatch.stage("camelot_read_pdf"):
+            tables = camelot.read_pdf(file_path)
+        if len(tables) == 0:
+            return None, None
+        df, table = tables[0].df, tables[0]
+
+    if table_cache is not None and content_hash:
+        try:
+            with stopwatch.stage("table_cache_write"):
+                table_cache.put(content_hash, df)
+        except Exception as e:
+            logger.warning("Could not cache the table of %s: %s", file_path, e)
+
+    return df, table
+
+
+def extract_report(file_path, template_path=None, table_cache=None, content_hash=None, stopwatch=None):
+    """
+    Parse a drilling report PDF and return its cleaned sections.
+
+    Runs inside the ingestion worker processes, so it must stay free of any
+    Flask or database state. Returns None when no table is found. When
+    template_path is given and no template exists yet, the first report that
+    Camelot parses and cleans successfully is used to learn one.
+    """
+    global _learning_failed
+
+    stopwatch = stopwatch or Stopwatch()
+    df, table = read_table(file_path, template_path, table_cache, content_hash, stopwatch)
+    if df is None:
+        return None
+
+    sections = cleaning_drilling_report_1(df, stopwatch)
+
+    if table is not None and template_path and not _learning_failed and load_template(template_path) is None:
+        try:
+            with stopwatch.stage("template_learn"):
+                save_template(learn_template(file_path, table), template_path)
+        except Exception as e:
+            _learning_failed = True
+            logger.warning("Could not learn a layout template from %s: %s", file_path, e)
+
+    return sections
+
+
+def extract_report_timed(file_path, template_path=None, table_cache=None, content_hash=None):
+    """
+    Like extract_report, but returns (sections, timings) where timings maps
+    each stage that ran in the worker to its duration in seconds.
+    """
+    stopwatch = Stopwatch()
+    sections = extract_report(file_path, template_path, table_cache, content_hash, stopwatch)
+    return sections, stopwatch.timings
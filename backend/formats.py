@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from flask import Response, request
+
+from queries import QueryError
+
+JSON_MIMETYPE = "application/json"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MIMETYPE = "application/vnd.apache.parquet"
+
+FORMATS = {"json": JSON_MIMETYPE, "arrow": ARROW_MIMETYPE, "parquet": PARQUET_MIMETYPE}
+
+# Arrow types for the column types used by the models; anything else is inferred
+ARROW_TYPES = {
+    float: pa.float64(),
+    int: pa.int64(),
+    str: pa.string(),
+    date: pa.date32(),
+    datetime: pa.timestamp("us"),
+}
+
+
+def requested_format():
+    """
+    The response format a bulk data endpoint should use: "json", "arrow" or "parquet".
+
+    Taken from the `format` query parameter, or else negotiated from the
+    Accept header. JSON stays the default, e.g. for browsers sending */*.
+    """
+    name = request.args.get("format")
+    if name:
+        if name not in FORMATS:
+            raise QueryError(f"Unknown format {name!r}; use one of {', '.join(FORMATS)}")
+        return name
+
+    mimetype = request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE, ARROW_MIMETYPE, PARQUET_MIMETYPE], default=JSON_MIMETYPE
+    )
+    return {mimetype: name for name, mimetype in FORMATS.items()}[mimetype]
+
+
+def _arrow_type(sql_type):
+    try:
+        return ARROW_TYPES.get(sql_type.python_type)
+    except NotImplementedError:
+        return None
+
+
+def to_arrow(columns, rows):
+    """
+    Build an Arrow table column by column from result rows.
+
+    `columns` are the selected columns of the query (anything with a `name`
+    and a SQLAlchemy `type`), in the same order as the values of each row.
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    return pa.table({
+        column.name: pa.array(column_values, type=_arrow_type(column.type))
+        for column, column_values in zip(columns, values)
+    })
+
+
+def columnar_response(table, format_name):
+    """Serialize an Arrow table as an Arrow IPC stream or a Parquet file."""
+    sink = pa.BufferOutputStream()
+    if format_name == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), mimetype=FORMATS[format_name])
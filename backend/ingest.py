@@ -0,0 +1,357 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import delete, insert, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from database import (
+    Profile,
+    GeneralData,
+    DrillingParameter,
+    AFE,
+    PersonnelInCharge,
+    Summary,
+    TimeBreakdown,
+    UploadIndex,
+    db,
+    upsert,
+)
+from claims import CLAIMED, INDEXED, lock_reports
+from daily_progress import progress_keys, refresh_daily_progress
+from data_version import bump_data_version
+from metrics import ROWS_INSERTED, STAGE_SECONDS
+from numeric_fields import numeric_values
+
+MESSAGE_SUCCESS = "File processed successfully"
+MESSAGE_DUPLICATE = "Data already exists in the database. Upload canceled."
+MESSAGE_REVISED = "File processed successfully, report updated to revision {revision}"
+MESSAGE_IN_PROGRESS = "The same file is already being processed. Upload canceled."
+
+# Answers for files whose bytes are already claimed (see claims.claim_upload)
+CLAIM_MESSAGES = {INDEXED: MESSAGE_DUPLICATE, CLAIMED: MESSAGE_IN_PROGRESS}
+
+# Insert order respects the foreign keys on profile.id
+SECTION_MODELS = [
+    GeneralData,
+    DrillingParameter,
+    AFE,
+    PersonnelInCharge,
+    Summary,
+]
+TABLE_ORDER = [Profile] + SECTION_MODELS + [TimeBreakdown, UploadIndex]
+
+
+def calculate_hash(data_dict):
+    data_string = "".join(str(value) for value in data_dict.values())
+    return hashlib.md5(data_string.encode()).hexdigest()
+
+
+def calculate_file_hash(stream, chunk_size=1 << 20):
+    """SHA-256 of a file-like object's bytes. The stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _columns(model):
+    return [column.name for column in model.__table__.columns if column.name != "profile_id"]
+
+
+def _profile_row(profile, unique_hash):
+    row = dict(profile, unique_hash=unique_hash)
+    row["id"] = Profile.make_id(profile.get("report_no"), profile.get("well_pad_name"))
+    # Bulk inserts skip the ORM's attribute coercion, so convert the date here
+    if isinstance(row.get("date"), str):
+        row["date"] = datetime.strptime(row["date"], "%Y-%m-%d").date()
+    return row
+
+
+def _index_row(report, profile_id):
+    return {
+        "content_hash": report["content_hash"],
+        "profile_id": profile_id,
+        "filename": report.get("filename"),
+        "file_path": report.get("file_path"),
+        "created_at": datetime.utcnow(),
+        "status": INDEXED,
+    }
+
+
+def build_rows(report, unique_hash):
+    """
+    Turn one report's cleaned sections into insert rows, keyed by model.
+    """
+    (
+        profile,
+        general,
+        drilling_parameter,
+        afe,
+        personnel_in_charge,
+        summary,
+        time_breakdown,
+    ) = report["sections"]
+
+    profile_row = _profile_row(profile, unique_hash)
+    profile_id = profile_row["id"]
+
+    rows = {Profile: [profile_row]}
+    for model, section in zip(
+        SECTION_MODELS, [general, drilling_parameter, afe, personnel_in_charge, summary]
+    ):
+        # Sections may omit fields their patterns did not find; insert those as NULL
+        row = {column: section.get(column) for column in _columns(model)}
+        row.update(numeric_values(model, row))
+        rows[model] = [dict(row, profile_id=profile_id)]
+
+    rows[TimeBreakdown] = [
+        dict({column: item.get(column) for column in _columns(TimeBreakdown)}, profile_id=profile_id)
+        for item in time_breakdown
+    ]
+
+    if report.get("content_hash"):
+        rows[UploadIndex] = [_index_row(report, profile_id)]
+
+    return rows
+
+
+def _insert_rows(rows_by_model):
+    # One executemany per table, in foreign key order
+    for model in TABLE_ORDER:
+        rows = rows_by_model.get(model)
+        if not rows:
+            continue
+        if model is UploadIndex:
+            upsert(UploadIndex, rows)  # Completes the claim taken before parsing
+        else:
+            db.session.execute(insert(model), rows)
+
+
+def _revise_rows(rows_by_model):
+    # Upsert keyed on the primary keys; unchanged rows are left untouched
+    changed = set()
+    for model in TABLE_ORDER:
+        rows = rows_by_model.get(model)
+        if not rows:
+            continue
+        if model is UploadIndex:
+            upsert(UploadIndex, rows)
+        else:
+            key = Profile.id if model is Profile else model.profile_id
+            changed.update(upsert(model, rows, only_changed=True, returning=[key]).scalars())
+
+    # Activities that are gone from the revised reports, in one statement
+    profile_ids = [row["id"] for row in rows_by_model[Profile]]
+    kept = [(row["profile_id"], row["start"]) for row in rows_by_model.get(TimeBreakdown, [])]
+    stale = delete(TimeBreakdown).where(TimeBreakdown.profile_id.in_(profile_ids))
+    if kept:
+        stale = stale.where(tuple_(TimeBreakdown.profile_id, TimeBreakdown.start).not_in(kept))
+    changed.update(db.session.execute(stale.returning(TimeBreakdown.profile_id)).scalars())
+
+    # Only reports that actually differ get a new revision
+    if changed:
+        db.session.execute(
+            update(Profile).where(Profile.id.in_(changed)).values(revision=Profile.revision + 1)
+        )
+    return changed
+
+
+def _merge_rows(batches):
+    merged = {}
+    for rows_by_model in batches:
+        for model, rows in rows_by_model.items():
+            merged.setdefault(model, []).extend(rows)
+    return merged
+
+
+def _already_stored(rows_by_model):
+    profile = rows_by_model[Profile][0]
+    return db.session.query(Profile.id).filter(
+        or_(Profile.id == profile["id"], Profile.unique_hash == profile["unique_hash"])
+    ).first() is not None
+
+
+def _write_reports(batch, write, messages):
+    """
+    Apply `write` to the merged rows of all reports in one savepoint. If that
+    fails, retry report by report, each inside its own savepoint, so one bad
+    file does not roll back the others. A report that conflicts with one
+    stored concurrently by another writer is reported as a duplicate.
+    Returns the union of what `write` returned for the reports written.
+    """
+    if not batch:
+        return set()
+    try:
+        with db.session.begin_nested():
+            return write(_merge_rows(rows for _, rows in batch)) or set()
+    except Exception:
+        # Find the offending reports, keeping everything else
+        written = set()
+        for position, rows in batch:
+            try:
+                with db.session.begin_nested():
+                    written |= write(rows) or set()
+            except IntegrityError as e:
+                messages[position] = MESSAGE_DUPLICATE if _already_stored(rows) else f"Failed to process: {str(e)}"
+            except Exception as e:
+                messages[position] = f"Failed to process: {str(e)}"
+        return written
+
+
+def save_reports(reports):
+    """
+    Persist a batch of cleaned reports in a single transaction.
+
+    Each report is a dict with the "sections" returned by
+    cleaning_drilling_report_1 and, optionally, the "content_hash",
+    "filename" and "file_path" of its upload, which are recorded in the upload
+    index. All new rows are written with one bulk insert per table. If that
+    fails, the batch is retried report by report, each inside its own
+    savepoint, so one bad file does not roll back the others.
+
+    A report with "revise" set replaces the stored report with the same
+    profile id instead of being rejected, even when its profile header is
+    unchanged: its rows are upserted, only rows whose values changed are
+    rewritten, activities no longer in the report are deleted and the
+    profile's revision count goes up. A revision that changes nothing is
+    reported as a duplicate.
+
+    Concurrent callers are serialized per report (see claims.lock_reports),
+    so the same report saved by two workers is stored once and reported as
+    a duplicate to the other. Must be called inside an application context.
+    Returns one result message per report, in order.
+    """
+    messages = [None] * len(reports)
+    unique_hashes = [calculate_hash(report["sections"][0]) for report in reports]
+
+    with STAGE_SECONDS.time(stage="report_lock"):
+        lock_reports(
+            Profile.make_id(report["sections"][0].get("report_no"), report["sections"][0].get("well_pad_name"))
+            for report in reports
+        )
+
+    with STAGE_SECONDS.time(stage="unique_hash_lookup"):
+        existing = dict(
+            db.session.query(Profile.unique_hash, Profile.id)
+            .filter(Profile.unique_hash.in_(set(unique_hashes)))
+            .all()
+        )
+
+        revise_ids = {
+            Profile.make_id(report["sections"][0].get("report_no"), report["sections"][0].get("well_pad_name"))
+            for report in reports
+            if report.get("revise")
+        }
+        stored_ids = set()
+        if revise_ids:
+            stored_ids = {row[0] for row in db.session.query(Profile.id).filter(Profile.id.in_(revise_ids))}
+
+    duplicate_index_rows = []
+    pending = []  # (position, rows_by_model)
+    revisions = []
+    for position, (report, unique_hash) in enumerate(zip(reports, unique_hashes)):
+        try:
+            profile = report["sections"][0]
+            revising = report.get("revise") and Profile.make_id(
+                profile.get("report_no"), profile.get("well_pad_name")
+            ) in stored_ids
+            # The hash only covers the profile header, so a revision may keep it
+            if unique_hash in existing and not revising:
+                messages[position] = MESSAGE_DUPLICATE
+                # Remember these bytes too, so the next copy is rejected before parsing
+                if report.get("content_hash"):
+                    duplicate_index_rows.append(_index_row(report, existing[unique_hash]))
+                continue
+
+            rows = build_rows(report, unique_hash)
+            profile_id = rows[Profile][0]["id"]
+            existing[unique_hash] = profile_id
+            if report.get("revise") and profile_id in stored_ids:
+                revisions.append((position, rows))
+            else:
+                pending.append((position, rows))
+                stored_ids.add(profile_id)  # A later revision in this batch updates it
+        except Exception as e:
+            messages[position] = f"Failed to process: {str(e)}"
+
+    try:
+        # Revised reports may move to another day; their old days need a refresh too
+        days = progress_keys([rows[Profile][0]["id"] for _, rows in revisions])
+
+        with STAGE_SECONDS.time(stage="insert"):
+            _write_reports(pending, _insert_rows, messages)
+
+        with STAGE_SECONDS.time(stage="revise"):
+            changed = _write_reports(revisions, _revise_rows, messages)
+
+        for position, _ in pending:
+            if messages[position] is None:
+                messages[position] = MESSAGE_SUCCESS
+
+        revised = []
+        for position, rows in revisions:
+            if messages[position] is None:
+                profile_id = rows[Profile][0]["id"]
+                if profile_id in changed:
+                    revised.append((position, profile_id))
+                else:
+                    messages[position] = MESSAGE_DUPLICATE  # Nothing in the report differs
+        if revised:
+            numbers = dict(
+                db.session.query(Profile.id, Profile.revision)
+                .filter(Profile.id.in_({profile_id for _, profile_id in revised}))
+                .all()
+            )
+            for position, profile_id in revised:
+                messages[position] = MESSAGE_REVISED.format(revision=numbers[profile_id])
+
+        written = []
+        for position, rows in pending + revisions:
+            if messages[position].startswith(MESSAGE_SUCCESS):
+                written.append(rows)
+            elif messages[position] == MESSAGE_DUPLICATE and reports[position].get("content_hash"):
+                # Stored concurrently by another writer; index these bytes as a duplicate
+                duplicate_index_rows.append(_index_row(reports[position], rows[Profile][0]["id"]))
+        with STAGE_SECONDS.time(stage="daily_progress"):
+            refresh_daily_progress(days | {
+                (rows[Profile][0]["well_pad_name"], rows[Profile][0]["date"]) for rows in written
+            })
+
+        for row in duplicate_index_rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.merge(UploadIndex(**row))
+            except Exception:
+                pass  # The index is only a shortcut; the duplicate is still reported
+
+        if written:
+            bump_data_version()
+        with STAGE_SECONDS.time(stage="commit"):
+            db.session.commit()
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for position, rows_by_model in pending:
+        if messages[position] == MESSAGE_SUCCESS:
+            for model, rows in rows_by_model.items():
+                ROWS_INSERTED.inc(len(rows), table=model.__tablename__)
+
+    return messages
+
+
+def save_report(sections, content_hash=None, filename=None, file_path=None):
+    """
+    Persist the sections returned by cleaning_drilling_report_1.
+
+    Returns the result message reported back to the client.
+    """
+    report = {
+        "sections": sections,
+        "content_hash": content_hash,
+        "filename": filename,
+        "file_path": file_path,
+    }
+    return save_reports([report])[0]
@@ -0,0 +1,295 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+from claims import CLAIM_RENEW_INTERVAL, CLAIM_TIMEOUT, release_uploads, renew_uploads
+from database import IngestJob, db
+from extraction import extract_report_timed
+from ingest import MESSAGE_DUPLICATE, save_reports
+from metrics import FAILURES, FILES_PROCESSED, STAGE_SECONDS, record_stages
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED = (DONE, FAILED)
+
+# Finished jobs are kept this long so clients can still poll them
+JOB_RETENTION = timedelta(days=1)
+
+# Reported for jobs whose process stopped before finishing them
+MESSAGE_STOPPED = "Processing stopped before the file was finished. Upload it again."
+
+# Most extracted reports persisted together in one transaction
+WRITE_BATCH_SIZE = 50
+
+
+class JobQueue:
+    """
+    Local ingestion queue.
+
+    Uploaded files are queued as one job each. A pool of dispatcher threads
+    pulls jobs off the queue and runs the Camelot extraction in a process pool
+    so files are parsed in parallel across cores. A single writer thread
+    collects the extracted reports and persists whatever has accumulated in
+    one transaction. The pools are started lazily on the first submit.
+
+    Every API worker process runs its own queue and pool, sized by
+    INGEST_WORKERS. By default that is the cores divided by WEB_CONCURRENCY,
+    the number of API workers, so all pools together stay within the cores.
+    This keeps ingestion in the process that accepted the upload, with no
+    separate service to deploy. The claims (see claims.py) make sure that no
+    two processes parse the same file.
+
+    Job statuses and result messages are stored in the ingest_job table, so
+    any API worker can answer polls. The process that accepted a job runs it
+    and renews its job row and upload claim while it does. It marks its
+    unfinished jobs failed and releases their claims when it exits. A job
+    left behind by a process that was killed is reported as failed once its
+    row has not been renewed for CLAIM_TIMEOUT, when its claim expires too.
+    """
+
+    def __init__(self, app, max_workers=None, table_cache=None):
+        self.app = app
+        self.table_cache = table_cache
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._queue = queue.Queue()
+        self._extracted = queue.Queue()
+        self._jobs = {}  # The unfinished jobs this process runs, with their file paths
+        self._lock = threading.Lock()
+        self._pool = None
+        self._threads = []
+
+    def submit(self, file_path, filename, batch_id=None, content_hash=None, revise=False):
+        """
+        Queue a stored PDF for ingestion and return its job record.
+
+        With `revise`, a report that is already stored is replaced by this one
+        (see ingest.save_reports).
+        """
+        now = datetime.utcnow()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "batch_id": batch_id,
+            "filename": filename,
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "revise": revise,
+            "status": QUEUED,
+            "message": "File queued for processing",
+            "created_at": now,
+            "updated_at": now,
+        }
+        row = IngestJob(**{key: value for key, value in job.items() if key != "file_path"})
+        public = self._public(row)
+
+        with self.app.app_context():
+            self._prune(now)
+            db.session.add(row)
+            db.session.commit()
+
+        with self._lock:
+            self._start()
+            self._jobs[job["job_id"]] = job
+
+        self._queue.put(job["job_id"])
+        return public
+
+    def get(self, job_id):
+        """The job's public record, or None. Must be called inside an application context."""
+        job = db.session.get(IngestJob, job_id)
+        return self._public(job) if job else None
+
+    def get_batch(self, batch_id):
+        """The public records of a batch's jobs. Must be called inside an application context."""
+        jobs = IngestJob.query.filter_by(batch_id=batch_id).order_by(IngestJob.created_at)
+        return [self._public(job) for job in jobs]
+
+    def _start(self):
+        # Caller holds self._lock
+        if self._pool is not None:
+            return
+
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        for _ in range(self.max_workers):
+            thread = threading.Thread(target=self._dispatch, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        for target in (self._write, self._renew):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.release_claims)
+
+    def _restart_pool(self, broken_pool):
+        # A worker process died; replace the pool once for every dispatcher
+        with self._lock:
+            if self._pool is broken_pool:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def _prune(self, now):
+        # Caller holds an application context; committed with the caller's transaction
+        db.session.execute(delete(IngestJob).where(IngestJob.updated_at < now - JOB_RETENTION))
+
+    def _update(self, changes):
+        """Record new statuses, given as (job_id, status, message), in one transaction."""
+        with self._lock:
+            for job_id, status, _ in changes:
+                if status in FINISHED:
+                    self._jobs.pop(job_id, None)
+
+        now = datetime.utcnow()
+        try:
+            with self.app.app_context():
+                db.session.execute(update(IngestJob), [
+                    {"job_id": job_id, "status": status, "message": message, "updated_at": now}
+                    for job_id, status, message in changes
+                ])
+                db.session.commit()
+        except Exception:
+            pass  # Polls report the job as failed once its row goes stale
+
+    def _fail(self, job_id, reason, message):
+        FAILURES.inc(reason=reason)
+        FILES_PROCESSED.inc(status=FAILED)
+        with self._lock:
+            content_hash = self._jobs[job_id]["content_hash"]
+        self._update([(job_id, FAILED, message)])
+
+        # Let the same file be uploaded again
+        try:
+            with self.app.app_context():
+                release_uploads([content_hash])
+        except Exception:
+            pass  # The claim expires after CLAIM_TIMEOUT
+
+    def _unfinished(self):
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def _renew(self):
+        # Keep the rows and claims of this process's unfinished jobs from going stale
+        while True:
+            time.sleep(CLAIM_RENEW_INTERVAL.total_seconds())
+            jobs = self._unfinished()
+            if not jobs:
+                continue
+            try:
+                with self.app.app_context():
+                    renew_uploads([job["content_hash"] for job in jobs])
+                    db.session.execute(
+                        update(IngestJob)
+                        .where(IngestJob.job_id.in_([job["job_id"] for job in jobs]))
+                        .values(updated_at=datetime.utcnow())
+                    )
+                    db.session.commit()
+            except Exception:
+                pass  # Retried on the next interval
+
+    def release_claims(self):
+        """
+        Mark the unfinished jobs failed and give up their claims, so their
+        files can be uploaded again right after a restart.
+        """
+        jobs = self._unfinished()
+        if not jobs:
+            return
+        self._update([(job["job_id"], FAILED, MESSAGE_STOPPED) for job in jobs])
+        try:
+            with self.app.app_context():
+                release_uploads([job["content_hash"] for job in jobs])
+        except Exception:
+            pass  # The claims expire after CLAIM_TIMEOUT
+
+    def _dispatch(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = dict(self._jobs[job_id])
+                pool = self._pool
+
+            STAGE_SECONDS.observe((datetime.utcnow() - job["created_at"]).total_seconds(), stage="queue_wait")
+            self._update([(job_id, RUNNING, "Processing file")])
+            try:
+                with STAGE_SECONDS.time(stage="extract"):
+                    sections, timings = pool.submit(
+                        extract_report_timed,
+                        job["file_path"],
+                        self.app.config.get("REPORT_TEMPLATE"),
+                        self.table_cache,
+                        job["content_hash"],
+                    ).result()
+                record_stages(timings)
+
+                if sections is None:
+                    self._fail(job_id, "no_tables", "No tables found")
+                    continue
+
+                self._update([(job_id, RUNNING, "Saving extracted data")])
+                self._extracted.put((job_id, {
+                    "sections": sections,
+                    "content_hash": job["content_hash"],
+                    "filename": job["filename"],
+                    "file_path": job["file_path"],
+                    "revise": job["revise"],
+                }))
+            except BrokenProcessPool as e:
+                self._restart_pool(pool)
+                self._fail(job_id, "worker_crashed", f"Failed to process: {str(e)}")
+            except Exception as e:
+                self._fail(job_id, "extraction_error", f"Failed to process: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self):
+        while True:
+            batch = [self._extracted.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._extracted.get_nowait())
+                except queue.Empty:
+                    break
+
+            job_ids = [job_id for job_id, _ in batch]
+            try:
+                with STAGE_SECONDS.time(stage="save_batch"), self.app.app_context():
+                    messages = save_reports([report for _, report in batch])
+            except Exception as e:
+                messages = [f"Failed to process: {str(e)}"] * len(batch)
+
+            done = []
+            for job_id, message in zip(job_ids, messages):
+                if message.startswith("Failed"):
+                    self._fail(job_id, "save_error", message)
+                    continue
+                FILES_PROCESSED.inc(status="duplicate" if message == MESSAGE_DUPLICATE else DONE)
+                done.append((job_id, DONE, message))
+            if done:
+                self._update(done)
+
+    @staticmethod
+    def _public(job):
+        status, message = job.status, job.message
+        if status not in FINISHED and job.updated_at < datetime.utcnow() - CLAIM_TIMEOUT:
+            status, message = FAILED, MESSAGE_STOPPED  # Its process was killed (see _renew)
+        return {
+            "job_id": job.job_id,
+            "batch_id": job.batch_id,
+            "filename": job.filename,
+            "content_hash": job.content_hash,
+            "revise": job.revise,
+            "status": status,
+            "message": message,
+            "created_at": job.created_at.isoformat(),
+            "updated_at": job.updated_at.isoformat(),
+        }
@@ -0,0 +1,235 @@
+import json
+import os
+
+import pandas as pd
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LAParams, LTLine, LTRect, LTTextLineHorizontal
+
+TEMPLATE_VERSION = 1
+
+# Same layout parameters Camelot uses, so text lines are grouped identically
+LAPARAMS = LAParams(
+    char_margin=1.0, line_margin=0.5, word_margin=0.1, detect_vertical=True, all_texts=True
+)
+
+# Max distance (PDF points) between a template boundary and a ruling line on the page
+TOLERANCE = 2.0
+
+# Keywords whose cell position must match the template before its output is trusted
+ANCHORS = [
+    'GENERAL',
+    'DRILLING PARAMETERS',
+    'AFE NUMBER',
+    'PERSONNEL IN CHARGE',
+    '24 HOURS SUMMARY',
+    'STATUS',
+    'START',
+    'ELAPSED',
+]
+
+
+class LayoutMismatch(Exception):
+    """Raised when a PDF does not follow the learned report layout."""
+
+
+def _first_page(file_path):
+    return next(extract_pages(file_path, page_numbers=[0], laparams=LAPARAMS))
+
+
+def _walk(layout):
+    # Text lines and rulings can be nested inside text boxes and figures
+    stack = list(layout)
+    while stack:
+        obj = stack.pop()
+        yield obj
+        if not isinstance(obj, LTTextLineHorizontal) and hasattr(obj, '__iter__'):
+            stack.extend(obj)
+
+
+def _text_lines(layout):
+    lines = [obj for obj in _walk(layout) if isinstance(obj, LTTextLineHorizontal)]
+    # Camelot fills cells top to bottom, then left to right
+    return sorted(lines, key=lambda t: (-t.y0, t.x0))
+
+
+def _horizontal_edges(layout, x):
+    """Y positions of the ruling lines on the page that cross the vertical line at x."""
+    edges = []
+    for obj in _walk(layout):
+        if not isinstance(obj, (LTLine, LTRect)) or not obj.x0 - TOLERANCE <= x <= obj.x1 + TOLERANCE:
+            continue
+        if obj.height <= TOLERANCE:
+            edges.append((obj.y0 + obj.y1) / 2.0)
+        elif isinstance(obj, LTRect):
+            edges.extend([obj.y0, obj.y1])
+
+    merged = []
+    for y in sorted(edges, reverse=True):
+        if not merged or merged[-1] - y > TOLERANCE:
+            merged.append(y)
+    return merged
+
+
+def _has_edge(edges, y):
+    return any(abs(edge - y) <= TOLERANCE for edge in edges)
+
+
+def _locate(line, rows, cols):
+    """Row and column of the grid cell holding a text line, following Camelot's rules."""
+    y = (line.y0 + line.y1) / 2.0
+    for r, (top, bottom) in enumerate(rows):
+        if bottom < y < top:
+            overlaps = []
+            for left, right in cols:
+                if left <= line.x1 and right >= line.x0:
+                    overlaps.append((min(right, line.x1) - max(left, line.x0)) / (right - left))
+                else:
+                    overlaps.append(-1)
+            best = max(overlaps)
+            if best < 0:
+                return None
+            return r, overlaps.index(best)
+    return None
+
+
+def _span_target(cells, r, c):
+    # Text in a spanning cell belongs to its top-left grid cell (Camelot's shift_text=['l', 't'])
+    if cells[r][c].hspan:
+        while not cells[r][c].left:
+            c -= 1
+    if cells[r][c].vspan:
+        while not cells[r][c].top:
+            r -= 1
+    return [r, c]
+
+
+def _find_anchors(df, n_rows):
+    anchors = {}
+    for keyword in ANCHORS:
+        for r in range(n_rows):
+            matches = [c for c in range(df.shape[1]) if keyword in str(df.iat[r, c])]
+            if matches:
+                anchors[keyword] = [r, matches[0]]
+                break
+    return anchors
+
+
+def _header_row(df):
+    for r in range(len(df)):
+        row = ' '.join(str(value) for value in df.iloc[r])
+        if 'START' in row and 'END' in row and 'ELAPSED' in row:
+            return r
+    raise LayoutMismatch('Time breakdown header not found')
+
+
+def extract_with_template(file_path, template):
+    """
+    Rebuild the Camelot table DataFrame of a report from the learned cell regions.
+
+    Text is read straight from the PDF and dropped into the template grid, so
+    no line detection runs. The fixed sections must sit exactly where the
+    template expects them; the time breakdown rows are taken from the ruling
+    lines below its header. Raises LayoutMismatch when the PDF does not follow
+    the template.
+    """
+    layout = _first_page(file_path)
+
+    width, height = template['page_size']
+    if abs(layout.width - width) > TOLERANCE or abs(layout.height - height) > TOLERANCE:
+        raise LayoutMismatch('Page size differs from the template')
+
+    cols = template['cols']
+    fixed_rows = template['fixed_rows']
+    start_column = cols[0]
+    edges = _horizontal_edges(layout, (start_column[0] + start_column[1]) / 2.0)
+
+    for top, bottom in fixed_rows:
+        if not (_has_edge(edges, top) and _has_edge(edges, bottom)):
+            raise LayoutMismatch('Section boundaries differ from the template')
+
+    header_bottom = fixed_rows[-1][1]
+    row_bounds = [header_bottom] + [y for y in edges if y < header_bottom - TOLERANCE]
+    variable_rows = [[top, bottom] for top, bottom in zip(row_bounds, row_bounds[1:])]
+    if not variable_rows:
+        raise LayoutMismatch('No time breakdown rows found')
+
+    rows = fixed_rows + variable_rows
+    grid = [['' for _ in cols] for _ in rows]
+    for line in _text_lines(layout):
+        index = _locate(line, rows, cols)
+        if index is None:
+            continue
+
+        r, c = index
+        if r < len(fixed_rows):
+            r, c = template['fixed_targets'][r][c]
+        else:
+            c = template['row_targets'][c]
+        grid[r][c] += line.get_text()
+
+    df = pd.DataFrame([[cell.strip() for cell in row] for row in grid])
+
+    for keyword, (r, c) in template['anchors'].items():
+        if keyword not in df.iat[r, c]:
+            raise LayoutMismatch(f"'{keyword}' is not where the template expects it")
+
+    if not df.iloc[len(fixed_rows):].apply(lambda row: 'TOTAL HRS' in ' '.join(row), axis=1).any():
+        raise LayoutMismatch('Time breakdown total row not found')
+
+    return df
+
+
+def learn_template(file_path, table):
+    """
+    Learn the cell regions of a report layout from a Camelot table of that report.
+
+    The template is only returned when replaying it on the same PDF reproduces
+    Camelot's DataFrame exactly; otherwise LayoutMismatch is raised.
+    """
+    df = table.df
+    header_row = _header_row(df)
+    layout = _first_page(file_path)
+
+    template = {
+        'version': TEMPLATE_VERSION,
+        'page_size': [layout.width, layout.height],
+        'cols': [list(col) for col in table.cols],
+        'fixed_rows': [list(row) for row in table.rows[:header_row + 1]],
+        'fixed_targets': [
+            [_span_target(table.cells, r, c) for c in range(len(table.cols))]
+            for r in range(header_row + 1)
+        ],
+        # Every time breakdown row shares the column spans of the first one
+        'row_targets': [
+            _span_target(table.cells, header_row + 1, c)[1] for c in range(len(table.cols))
+        ],
+        'anchors': _find_anchors(df, header_row + 1),
+    }
+
+    replayed = extract_with_template(file_path, template)
+    if replayed.shape != df.shape or not (replayed.values == df.values).all():
+        raise LayoutMismatch('Template does not reproduce the Camelot table')
+
+    return template
+
+
+def load_template(path):
+    """Load a saved template, or return None if there is no usable one."""
+    try:
+        with open(path) as f:
+            template = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if template.get('version') != TEMPLATE_VERSION:
+        return None
+    return template
+
+
+def save_template(template, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Several worker processes may learn at once; publish the file atomically
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(template, f)
+    os.replace(tmp_path, path)
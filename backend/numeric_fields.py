@@ -0,0 +1,116 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import update
+
+from database import AFE, DrillingParameter, GeneralData, db
+
+# Text field -> typed columns it fills. A field with several columns holds
+# "a / b" (or "a / b / c") values, split on the slashes in that order.
+NUMERIC_FIELDS = {
+    GeneralData: {
+        "rig_power": ["rig_power_num"],
+        "kb_elevation": ["kb_elevation_num"],
+        "midnight_depth": ["midnight_depth_num"],
+        "progress": ["progress_num"],
+        "proposed_td": ["proposed_td_num"],
+        "planned_days": ["planned_days_num"],
+        "days_from_rig_release": ["days_from_rig_release_num"],
+    },
+    DrillingParameter: {
+        "average_wob_24_hrs": ["average_wob_24_hrs_num"],
+        "average_rop_24_hrs": ["average_rop_24_hrs_num"],
+        "average_surface_rpm_dhm": ["surface_rpm_num", "dhm_rpm_num"],
+        "on_off_bottom_torque": ["on_bottom_torque_num", "off_bottom_torque_num"],
+        "flowrate_spp": ["flowrate_num", "spp_num"],
+        "air_rate": ["air_rate_num"],
+        "corr_inhib_foam_rate": ["corr_inhib_rate_num", "foam_rate_num"],
+        "puw_sow_rotw": ["puw_num", "sow_num", "rotw_num"],
+        "total_drilling_time": ["total_drilling_time_num"],
+        "ton_miles": ["ton_miles_num"],
+    },
+    AFE: {
+        "afe_number_afe_cost": ["afe_cost_usd"],
+        "daily_cost": ["daily_cost_usd"],
+        "percent_afe_cumulative_cost": ["cumulative_cost_usd"],
+        "daily_mud_cost": ["daily_mud_cost_usd"],
+        "cumulative_mud_cost": ["cumulative_mud_cost_usd"],
+    },
+}
+
+NUMBER_PATTERN = re.compile(r'-?\d[\d,]*(?:\.\d+)?|-?\.\d+')
+
+
+def _number(text, as_decimal=False):
+    """First number in a text such as '1,234.5 m' or 'USD 85,000.00', or None."""
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    value = match.group().replace(",", "")
+    try:
+        return Decimal(value) if as_decimal else float(value)
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_values(text, count=1, as_decimal=False):
+    """
+    Parse `count` numbers out of a report value.
+
+    With count > 1 the text is split on '/' and each part must hold a number,
+    otherwise every value is None rather than guessing which one is missing.
+    """
+    if text is None:
+        return [None] * count
+    text = str(text)
+    parts = text.split("/") if count > 1 else [text]
+    if len(parts) != count:
+        return [None] * count
+    values = [_number(part, as_decimal) for part in parts]
+    if count > 1 and None in values:
+        return [None] * count
+    return values
+
+
+def numeric_values(model, row):
+    """Typed column values for one row of text values of `model`."""
+    columns = model.__table__.columns
+    typed = {}
+    for field, targets in NUMERIC_FIELDS.get(model, {}).items():
+        # Costs go to Numeric columns; keep them exact
+        as_decimal = columns[targets[0]].type.python_type is Decimal
+        typed.update(zip(targets, parse_values(row.get(field), len(targets), as_decimal)))
+    return typed
+
+
+def backfill_numeric_columns(batch_size=1000):
+    """
+    Recompute the typed columns of every stored row from its text values.
+
+    Walks each table in profile_id order, one batch per transaction, so it can
+    run against a live database and be interrupted safely. Must be called
+    inside an application context. Returns the rows updated per table.
+    """
+    counts = {}
+    for model, fields in NUMERIC_FIELDS.items():
+        text_columns = [getattr(model, field) for field in fields]
+        counts[model.__tablename__] = 0
+        last_id = None
+        while True:
+            query = db.session.query(model.profile_id, *text_columns).order_by(model.profile_id)
+            if last_id is not None:
+                query = query.filter(model.profile_id > last_id)
+            batch = query.limit(batch_size).all()
+            if not batch:
+                break
+
+            rows = [
+                dict(numeric_values(model, dict(zip(fields, values))), profile_id=profile_id)
+                for profile_id, *values in batch
+            ]
+            db.session.execute(update(model), rows)
+            db.session.commit()
+
+            counts[model.__tablename__] += len(rows)
+            last_id = batch[-1][0]
+    return counts
@@ -1,229 +1,344 @@
 import re, pandas as pd
 from datetime import datetime
 
-def cleaning_drilling_report_1(df):
-    def cleaning_profile(df):
-
-        extracted_data = df.iloc[:4, 0].values
-
-        patterns = {
-            'operator': r'OPERATOR\s+(.*)\s+CONTRACTOR',
-            'contractor': r'CONTRACTOR\s+(.*)\s+REPORT NO',
-            'report_no': r'REPORT NO.\s+#\s*(\d+)',
-            'well_pad_name': r'WELL/\s*PAD NAME\s+(.*?)\s+FIELD',
-            'field': r'FIELD\s+(\w+)',
-            'well_type_profile': r'WELL\s*TYPE/\s*PROFILE\s+(.*?)\s+LATITUDE',
-            'latitude_longitude': r'LATITUDE/\s*LONGITUDE\s+(.*?)\s+GL',
-            'environment': r'ENVIRONTMENT\s+(\w+)',
-            'gl_msl_m': r'GL\s+-\s+MSL\s*\(M\)\s*(.*)',  # Capture everything after GL - MSL (M)
-        }
-
-        profile_data = {}
-
-        date_pattern = r'\b\d{1,2}-[A-Za-z]{3}-\d{2,4}\b'
-        match = re.search(date_pattern, extracted_data[0], re.IGNORECASE)
-        if match:
-            raw_date = match.group()
-            try:
-                formatted_date = datetime.strptime(raw_date, '%d-%b-%y').strftime('%Y-%m-%d')
-                profile_data['date'] = formatted_date
-            except ValueError:
-                profile_data['date'] = None
-        else:
-            profile_data['date'] = None
-
-        # Extract data for other keys
-        for key, pattern in patterns.items():
-            for line in extracted_data:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    value = match.group(1).strip()
-                    if key == 'gl_msl_m':
-                        value = re.sub(r'[^\d.]+', '', value)
-                    profile_data[key] = value
-                    break
+from metrics import Stopwatch
+
+# Section anchors the cleaning helpers look up. They keep the regex semantics
+# of the original str.contains scans ('24.0' matches any character at '.').
+ANCHOR_KEYWORDS = [
+    'GENERAL',
+    'DRILLING PARAMETERS',
+    'AFE NUMBER',
+    'AFE',
+    'PERSONNEL IN CHARGE',
+    '24 HOURS SUMMARY',
+    'STATUS',
+    'START',
+    'END',
+    'ELAPSED',
+    'TOTAL HRS',
+    '24.0',
+]
+
+
+# Compiled field patterns per report section, keyed by field set name. Each
+# pattern captures the field value in group 1. Compiled once at import, so
+# every call and every ingestion worker process reuses them.
+FIELD_SETS = {}
+
+
+def register_field_set(name, patterns, flags=re.IGNORECASE):
+    """
+    Register (or replace) a named set of field patterns.
+
+    `patterns` maps field names to regexes whose first group is the value.
+    New report variants can register their own sets and read them with
+    extract_fields.
+    """
+    FIELD_SETS[name] = [(key, re.compile(pattern, flags)) for key, pattern in patterns.items()]
+
+
+def extract_fields(name, lines):
+    """
+    Fill each field of a registered set from the first line it matches.
+
+    The lines are scanned once, trying only the fields still missing, and the
+    scan stops as soon as every field is found. Returns the found fields in
+    registration order.
+    """
+    field_set = FIELD_SETS[name]
+    remaining = field_set
+    found = {}
+    for line in lines:
+        if not remaining:
+            break
+        missing = []
+        for key, pattern in remaining:
+            match = pattern.search(line)
+            if match:
+                found[key] = match.group(1).strip()
             else:
-                profile_data[key] = None
-
-        return profile_data
-
-    def cleaning_general(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('GENERAL').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('24 HOURS SUMMARY').any(), axis=1)].index[0]
-
-        start_column_index = df.apply(lambda x: x.astype(str).str.contains('GENERAL').any(), axis=0).idxmax()
-        end_column_index = df.apply(lambda x: x.astype(str).str.contains('DRILLING PARAMETERS').any(), axis=0).idxmax()
-        
-        data_subset = df.iloc[start_index + 1:end_index - 1, start_column_index + 1:end_column_index]
-        cleaned_columns = data_subset.dropna(axis=1, how='all')  
-        df_cleaned = cleaned_columns.loc[:, ~(cleaned_columns == '').all()].reset_index(drop=True)
-
-        patterns = [
-                'rig_type_name',
-                'rig_power',
-                'kb_elevation',
-                'midnight_depth',
-                'progress',
-                'proposed_td',
-                'spud_date',
-                'release_date',
-                'planned_days',
-                'days_from_rig_release'
-            ]
-
-        result_dict = {patterns[i]: df_cleaned.iloc[i, 0] for i in range(len(patterns))}
-
-        return result_dict
-
-    def cleaning_drilling_parameter(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('DRILLING PARAMETERS').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('24 HOURS SUMMARY').any(), axis=1)].index[0]
-
-        afe_column_index = df.apply(lambda x: x.astype(str).str.contains('AFE NUMBER').any(), axis=0).idxmax()
-        column_before_afe = df.columns.get_loc(afe_column_index) - 1
-
-        df_cleaned = df.iloc[start_index + 1:end_index - 1, column_before_afe].reset_index(drop=True)
-        
-        patterns = [
-                'average_wob_24_hrs',
-                'average_rop_24_hrs',
-                'average_surface_rpm_dhm',
-                'on_off_bottom_torque',
-                'flowrate_spp',
-                'air_rate',
-                'corr_inhib_foam_rate',
-                'puw_sow_rotw',
-                'total_drilling_time',
-                'ton_miles'
+                missing.append((key, pattern))
+        remaining = missing
+
+    # Keep the registration order; the profile hash depends on it
+    return {key: found[key] for key, _ in field_set if key in found}
+
+
+TIME_PATTERN = r'^(\d{1,2}):(\d{1,2})$'
+
+DATE_PATTERN = re.compile(r'\b\d{1,2}-[A-Za-z]{3}-\d{2,4}\b', re.IGNORECASE)
+
+register_field_set('profile', {
+    'operator': r'OPERATOR\s+(.*)\s+CONTRACTOR',
+    'contractor': r'CONTRACTOR\s+(.*)\s+REPORT NO',
+    'report_no': r'REPORT NO.\s+#\s*(\d+)',
+    'well_pad_name': r'WELL/\s*PAD NAME\s+(.*?)\s+FIELD',
+    'field': r'FIELD\s+(\w+)',
+    'well_type_profile': r'WELL\s*TYPE/\s*PROFILE\s+(.*?)\s+LATITUDE',
+    'latitude_longitude': r'LATITUDE/\s*LONGITUDE\s+(.*?)\s+GL',
+    'environment': r'ENVIRONTMENT\s+(\w+)',
+    'gl_msl_m': r'GL\s+-\s+MSL\s*\(M\)\s*(.*)',  # Capture everything after GL - MSL (M)
+})
+
+register_field_set('afe', {
+    'afe_number_afe_cost': r'AFE NUMBER / AFE COST\nUSD ([\d,]+\.\d+)',
+    'daily_cost': r'DAILY COST\nUSD ([\d,]+\.\d+)',
+    'percent_afe_cumulative_cost': r'% AFE / CUMULATIVE COST\n(?:[\d\.]+)%\nUSD ([\d,]+\.\d+)',
+    'daily_mud_cost': r'DAILY MUD COST\nUSD ([\d,]+\.\d+)',
+    'cumulative_mud_cost': r'CUMULATIVE MUD COST\nUSD ([\d,]+\.\d+)'
+})
+
+register_field_set('personnel_in_charge', {
+    'day_night_drilling_supv': r'(?:DAY/ NIGHT DRILLING SUPV\.\s*|)\s*([A-Za-z.-]+(?: [A-Za-z.-]+)*\s*/\s*[A-Za-z.-]+(?: [A-Za-z.-]+)*)\s*(?:DAY/ NIGHT DRILLING SUPV\.|)',
+    'drilling_superintendent': r'(.+?)\s*DRILLING SUPERINTENDENT\s*(.+)?',
+    'rig_superintendent': r'RIG SUPERINTENDENT\n(.+)',
+    'drilling_engineer': r'DRILLING ENGINEER\n(.+)',
+    'hse_supervisor': r'(.+?)\s*HSE SUPERVISOR\s*(.+)?'
+})
+
+
+class SectionLocator:
+    """
+    Positions of the anchor keywords in a raw report table.
+
+    Built once per table: the frame is cast to strings and flattened a single
+    time, and one regex with an optional lookahead per keyword reports every
+    keyword a cell contains in one pass. The cleaning helpers then answer
+    their row and column lookups from the resulting (row, column) lists
+    instead of rescanning the whole frame.
+    """
+
+    def __init__(self, df, keywords=ANCHOR_KEYWORDS):
+        self.columns = list(df.columns)
+        self.positions = {keyword: [] for keyword in keywords}
+
+        groups = ''.join(f'(?:(?=.*?(?P<k{i}>{keyword})))?' for i, keyword in enumerate(keywords))
+        values = df.astype(str).to_numpy().ravel()
+        cells = pd.Series(values, index=pd.MultiIndex.from_product([df.index, df.columns]))
+        found = cells.str.extract(f'(?s)^{groups}').notna()
+
+        for i, keyword in enumerate(keywords):
+            # Cells are in row-major order, like the original scans
+            self.positions[keyword] = list(cells.index[found[f'k{i}'].to_numpy()])
+
+    def first_row(self, *keywords):
+        """First row containing every keyword (each in any of its cells)."""
+        rows = set.intersection(*(self._rows(keyword) for keyword in keywords))
+        if not rows:
+            raise IndexError(f'No row contains {", ".join(keywords)}')
+        return min(rows)
+
+    def first_column(self, keyword):
+        """First column containing the keyword; the first column if none does, like idxmax."""
+        columns = [column for _, column in self.positions[keyword]]
+        if not columns:
+            return self.columns[0]
+        return min(columns, key=self.columns.index)
+
+    def _rows(self, keyword):
+        return {row for row, _ in self.positions[keyword]}
+
+
+def cleaning_profile(df, locator=None):
+    extracted_data = df.iloc[:4, 0].values
+
+    profile_data = {}
+
+    match = DATE_PATTERN.search(extracted_data[0])
+    if match:
+        raw_date = match.group()
+        try:
+            formatted_date = datetime.strptime(raw_date, '%d-%b-%y').strftime('%Y-%m-%d')
+            profile_data['date'] = formatted_date
+        except ValueError:
+            profile_data['date'] = None
+    else:
+        profile_data['date'] = None
+
+    # Extract data for other keys
+    fields = extract_fields('profile', extracted_data)
+    for key, _ in FIELD_SETS['profile']:
+        value = fields.get(key)
+        if key == 'gl_msl_m' and value is not None:
+            value = re.sub(r'[^\d.]+', '', value)
+        profile_data[key] = value
+
+    return profile_data
+
+
+def cleaning_general(df, locator=None):
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('GENERAL')
+    end_index = locator.first_row('24 HOURS SUMMARY')
+
+    start_column_index = locator.first_column('GENERAL')
+    end_column_index = locator.first_column('DRILLING PARAMETERS')
+    
+    data_subset = df.iloc[start_index + 1:end_index - 1, start_column_index + 1:end_column_index]
+    cleaned_columns = data_subset.dropna(axis=1, how='all')  
+    df_cleaned = cleaned_columns.loc[:, ~(cleaned_columns == '').all()].reset_index(drop=True)
+
+    patterns = [
+            'rig_type_name',
+            'rig_power',
+            'kb_elevation',
+            'midnight_depth',
+            'progress',
+            'proposed_td',
+            'spud_date',
+            'release_date',
+            'planned_days',
+            'days_from_rig_release'
         ]
 
-        result_dict = {patterns[i]: df_cleaned[i] for i in range(len(patterns))}
+    result_dict = {patterns[i]: df_cleaned.iloc[i, 0] for i in range(len(patterns))}
 
-        return result_dict
+    return result_dict
 
-    def cleaning_afe(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('AFE').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('PERSONNEL IN CHARGE').any(), axis=1)].index[0]
 
-        afe_column_index = df.apply(lambda x: x.astype(str).str.contains('AFE NUMBER').any(), axis=0).idxmax()
-        df_cleaned = df.iloc[start_index + 1:end_index, afe_column_index].reset_index(drop=True)
+def cleaning_drilling_parameter(df, locator=None):
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('DRILLING PARAMETERS')
+    end_index = locator.first_row('24 HOURS SUMMARY')
 
-        patterns = {
-                'afe_number_afe_cost': r'AFE NUMBER / AFE COST\nUSD ([\d,]+\.\d+)',
-                'daily_cost': r'DAILY COST\nUSD ([\d,]+\.\d+)',
-                'percent_afe_cumulative_cost': r'% AFE / CUMULATIVE COST\n(?:[\d\.]+)%\nUSD ([\d,]+\.\d+)',
-                'daily_mud_cost': r'DAILY MUD COST\nUSD ([\d,]+\.\d+)',
-                'cumulative_mud_cost': r'CUMULATIVE MUD COST\nUSD ([\d,]+\.\d+)'
-            }
+    afe_column_index = locator.first_column('AFE NUMBER')
+    column_before_afe = df.columns.get_loc(afe_column_index) - 1
 
-        result_dict = {}
+    df_cleaned = df.iloc[start_index + 1:end_index - 1, column_before_afe].reset_index(drop=True)
+    
+    patterns = [
+            'average_wob_24_hrs',
+            'average_rop_24_hrs',
+            'average_surface_rpm_dhm',
+            'on_off_bottom_torque',
+            'flowrate_spp',
+            'air_rate',
+            'corr_inhib_foam_rate',
+            'puw_sow_rotw',
+            'total_drilling_time',
+            'ton_miles'
+    ]
 
-        for key, pattern in patterns.items():
-                for line in df_cleaned:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        result_dict[key] = match.group(1).strip()
-                        break
+    result_dict = {patterns[i]: df_cleaned[i] for i in range(len(patterns))}
 
-        return result_dict
+    return result_dict
 
-    def cleaning_personnel_in_charge(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('PERSONNEL IN CHARGE').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('24 HOURS SUMMARY').any(), axis=1)].index[0]
 
-        afe_column_index = df.apply(lambda x: x.astype(str).str.contains('AFE NUMBER').any(), axis=0).idxmax()
-        df_cleaned = df.iloc[start_index + 1:end_index, afe_column_index].reset_index(drop=True)
+def cleaning_afe(df, locator=None):
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('AFE')
+    end_index = locator.first_row('PERSONNEL IN CHARGE')
 
-        patterns = {
-                'day_night_drilling_supv': r'(?:DAY/ NIGHT DRILLING SUPV\.\s*|)\s*([A-Za-z.-]+(?: [A-Za-z.-]+)*\s*/\s*[A-Za-z.-]+(?: [A-Za-z.-]+)*)\s*(?:DAY/ NIGHT DRILLING SUPV\.|)',
-                'drilling_superintendent': r'(.+?)\s*DRILLING SUPERINTENDENT\s*(.+)?',
-                'rig_superintendent': r'RIG SUPERINTENDENT\n(.+)',
-                'drilling_engineer': r'DRILLING ENGINEER\n(.+)',
-                'hse_supervisor': r'(.+?)\s*HSE SUPERVISOR\s*(.+)?'
-            }
+    afe_column_index = locator.first_column('AFE NUMBER')
+    df_cleaned = df.iloc[start_index + 1:end_index, afe_column_index].reset_index(drop=True)
 
-        result_dict = {}
+    return extract_fields('afe', df_cleaned)
 
-        for key, pattern in patterns.items():
-                for line in df_cleaned:
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if match:
-                        result_dict[key] = match.group(1).strip()
-                        break
 
-        return result_dict
+def cleaning_personnel_in_charge(df, locator=None):
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('PERSONNEL IN CHARGE')
+    end_index = locator.first_row('24 HOURS SUMMARY')
 
-    def cleaning_summary(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('24 HOURS SUMMARY').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('STATUS').any(), axis=1)].index[0]
-        df_cleaned = df.iloc[start_index :end_index + 1, 4].reset_index(drop=True)
-        df_cleaned = df_cleaned.replace(r'\n', ' ', regex=True)
+    afe_column_index = locator.first_column('AFE NUMBER')
+    df_cleaned = df.iloc[start_index + 1:end_index, afe_column_index].reset_index(drop=True)
 
-        patterns = [
-                'hours_24_summary',
-                'hours_24_forecast',
-                'status'
-        ]
+    return extract_fields('personnel_in_charge', df_cleaned)
+
+
+def cleaning_summary(df, locator=None):
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('24 HOURS SUMMARY')
+    end_index = locator.first_row('STATUS')
+    df_cleaned = df.iloc[start_index :end_index + 1, 4].reset_index(drop=True)
+    df_cleaned = df_cleaned.replace(r'\n', ' ', regex=True)
+
+    patterns = [
+            'hours_24_summary',
+            'hours_24_forecast',
+            'status'
+    ]
+
+    result_dict = {patterns[i]: df_cleaned[i] for i in range(len(patterns))}
+
+    return result_dict
+
+
+def _hours(column):
+    """Convert a column of 'HH:MM' strings to float hours, with '24:00' as 24.0."""
+    parts = column.str.extract(TIME_PATTERN)
+    hours = pd.to_numeric(parts[0])
+    minutes = pd.to_numeric(parts[1])
+    midnight = column == '24:00'
+
+    invalid = ~(midnight | ((hours < 24) & (minutes < 60)))
+    if invalid.any():
+        raise ValueError(f"time data {column[invalid].iloc[0]!r} does not match format '%H:%M'")
+
+    return (hours + minutes / 60.0).mask(midnight, 24.0)
+
+
+def _numbers(column):
+    """Convert a column of numeric strings to floats, handling commas and empty strings."""
+    values = column.str.replace(',', '', regex=False)
+    return pd.to_numeric(values.mask(values == ''), errors='raise')
+
+
+def time_breakdown_frame(df, locator=None):
+    """
+    Time breakdown block as a typed DataFrame, converted column by column.
+
+    START/END become float hours and ELAPSED/DEPTH floats (NaN when empty).
+    """
+    locator = locator or SectionLocator(df)
+    start_index = locator.first_row('START', 'END', 'ELAPSED')
+    end_index = locator.first_row('TOTAL HRS', '24.0')
+
+    df_cleaned = df.iloc[start_index + 1:end_index].reset_index(drop=True)
+    df_cleaned = df_cleaned.iloc[:, :9]
+
+    return pd.DataFrame({
+        'start': _hours(df_cleaned.iloc[:, 0]),
+        'end': _hours(df_cleaned.iloc[:, 1]),
+        'elapsed': _numbers(df_cleaned.iloc[:, 2]),
+        'depth': _numbers(df_cleaned.iloc[:, 3]),
+        'pt_npt': df_cleaned.iloc[:, 5],
+        'code': df_cleaned.iloc[:, 6],
+        'description': df_cleaned.iloc[:, 7],
+        'operation': df_cleaned.iloc[:, 8],
+    })
+
+
+def cleaning_time_breakdown(df, locator=None):
+    frame = time_breakdown_frame(df, locator)
+
+    # Plain Python values with None for NaN, ready for bulk insert
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def cleaning_drilling_report_1(df, stopwatch=None):
+    # `stopwatch` collects the time spent per section for the ingestion metrics
+    stopwatch = stopwatch or Stopwatch()
+
+    # Locate every section once; all helpers share the same index
+    with stopwatch.stage('clean_locator'):
+        locator = SectionLocator(df)
 
-        result_dict = {patterns[i]: df_cleaned[i] for i in range(len(patterns))}
-
-        return result_dict
-
-    def cleaning_time_breakdown(df):
-        start_index = df[df.apply(lambda x: x.astype(str).str.contains('START').any() &
-                                x.astype(str).str.contains('END').any() &
-                                x.astype(str).str.contains('ELAPSED').any(), axis=1)].index[0]
-        end_index = df[df.apply(lambda x: x.astype(str).str.contains('TOTAL HRS').any() &
-                                x.astype(str).str.contains('24.0').any(), axis=1)].index[0]
-
-        df_cleaned = df.iloc[start_index + 1:end_index].reset_index(drop=True)
-        df_cleaned = df_cleaned.iloc[:, :9]
-
-        def convert_time(time_str):
-            if time_str == '24:00':
-                return 24.0
-            time_obj = datetime.strptime(time_str, "%H:%M")
-            return time_obj.hour + time_obj.minute / 60.0
-        
-        def to_float(value):
-            """Convert a string to a float, handling commas and empty strings."""
-            if pd.isnull(value) or value == '':
-                return None
-            return float(value.replace(',', ''))
-
-        result_list = []
-        for i in range(len(df_cleaned)):
-            # Convert start and end columns to float (hours)
-            start_time = df_cleaned.iloc[i, 0]
-            end_time = df_cleaned.iloc[i, 1]
-
-            # Parse time strings to datetime objects
-            start_float = convert_time(start_time)
-            end_float = convert_time(end_time)
-
-            elapsed = to_float(df_cleaned.iloc[i, 2])
-            depth = to_float(df_cleaned.iloc[i, 3])
-
-            result_list.append({
-                'start': start_float,
-                'end': end_float,
-                'elapsed': elapsed,
-                'depth': depth,
-                'pt_npt': df_cleaned.iloc[i, 5],
-                'code': df_cleaned.iloc[i, 6],
-                'description': df_cleaned.iloc[i, 7],
-                'operation': df_cleaned.iloc[i, 8]  #  Pastikan kolom operation ada dalam data
-            })
-
-        return result_list
-
-    profile = cleaning_profile(df)
-    general = cleaning_general(df)
-    drilling_parameter = cleaning_drilling_parameter(df)
-    afe = cleaning_afe(df)
-    personnel_in_charge = cleaning_personnel_in_charge(df)
-    summary = cleaning_summary(df)
-    time_breakdown = cleaning_time_breakdown(df)
+    with stopwatch.stage('clean_profile'):
+        profile = cleaning_profile(df, locator)
+    with stopwatch.stage('clean_general'):
+        general = cleaning_general(df, locator)
+    with stopwatch.stage('clean_drilling_parameter'):
+        drilling_parameter = cleaning_drilling_parameter(df, locator)
+    with stopwatch.stage('clean_afe'):
+        afe = cleaning_afe(df, locator)
+    with stopwatch.stage('clean_personnel_in_charge'):
+        personnel_in_charge = cleaning_personnel_in_charge(df, locator)
+    with stopwatch.stage('clean_summary'):
+        summary = cleaning_summary(df, locator)
+    with stopwatch.stage('clean_time_breakdown'):
+        time_breakdown = cleaning_time_breakdown(df, locator)
 
     return (
         profile,
@@ -233,4 +348,4 @@ def cleaning_drilling_report_1(df):
         personnel_in_charge,
         summary,
         time_breakdown,
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,194 @@
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import func, select, tuple_
+
+from database import AFE, DailyProgress, PersonnelInCharge, Profile, Summary, TimeBreakdown
+
+# Columns /time_breakdown can return, by name
+TIME_BREAKDOWN_COLUMNS = {
+    "profile_id": TimeBreakdown.profile_id,
+    "start": TimeBreakdown.start,
+    "end": TimeBreakdown.end,
+    "elapsed": TimeBreakdown.elapsed,
+    "depth": TimeBreakdown.depth,
+    "pt_npt": TimeBreakdown.pt_npt,
+    "code": TimeBreakdown.code,
+    "description": TimeBreakdown.description,
+    "operation": TimeBreakdown.operation,
+    "date": Profile.date,
+    "well_pad_name": Profile.well_pad_name,
+}
+DEFAULT_TIME_BREAKDOWN_COLUMNS = [
+    "profile_id", "start", "end", "elapsed", "depth", "description", "date", "well_pad_name",
+]
+
+# Report fields shown in the dashboard's detail view
+DETAIL_COLUMNS = [
+    Profile.id,
+    Profile.contractor,
+    Profile.report_no,
+    Profile.field,
+    Profile.latitude_longitude,
+    AFE.afe_number_afe_cost,
+    AFE.daily_cost,
+    AFE.percent_afe_cumulative_cost,
+    AFE.daily_mud_cost,
+    AFE.cumulative_mud_cost,
+    PersonnelInCharge.day_night_drilling_supv,
+    PersonnelInCharge.drilling_superintendent,
+    PersonnelInCharge.rig_superintendent,
+    PersonnelInCharge.drilling_engineer,
+    PersonnelInCharge.hse_supervisor,
+    Summary.hours_24_summary,
+]
+
+# The keyset: a unique, indexed sort order, so pages never skip or repeat rows
+KEY_COLUMNS = ["date", "profile_id", "start"]
+
+
+class QueryError(ValueError):
+    """Invalid query parameters, reported to the client as a 400."""
+
+
+def parse_columns(value):
+    """Comma-separated column names, or the default columns when empty."""
+    if not value:
+        return list(DEFAULT_TIME_BREAKDOWN_COLUMNS)
+    columns = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in columns if name not in TIME_BREAKDOWN_COLUMNS]
+    if unknown:
+        raise QueryError(f"Unknown columns: {', '.join(unknown)}")
+    return columns
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing after `row`, which must hold the key columns."""
+    key = [row["date"].isoformat(), row["profile_id"], row["start"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        day, profile_id, start = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(day), str(profile_id), float(start)
+    except (ValueError, TypeError):
+        raise QueryError("Invalid cursor")
+
+
+def encode_report_cursor(profile_id):
+    """Opaque cursor pointing after the report `profile_id`, for pages of /detail."""
+    return base64.urlsafe_b64encode(json.dumps([profile_id]).encode()).decode()
+
+
+def decode_report_cursor(cursor):
+    try:
+        (profile_id,) = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(profile_id)
+    except (ValueError, TypeError):
+        raise QueryError("Invalid cursor")
+
+
+def time_breakdown_query(well_pad_name=None, date_from=None, date_to=None, columns=None, after=None, limit=None):
+    """
+    Activities joined with their report's date and well pad, in keyset order.
+
+    `after` is a decoded cursor; only rows after it are returned. The key
+    columns are always selected, in addition to `columns`.
+    """
+    selected = list(dict.fromkeys((columns or DEFAULT_TIME_BREAKDOWN_COLUMNS) + KEY_COLUMNS))
+    query = select(*(TIME_BREAKDOWN_COLUMNS[name].label(name) for name in selected)).join_from(
+        TimeBreakdown, Profile, TimeBreakdown.profile_id == Profile.id
+    )
+
+    if well_pad_name:
+        query = query.where(Profile.well_pad_name == well_pad_name)
+    if date_from:
+        query = query.where(Profile.date >= date_from)
+    if date_to:
+        query = query.where(Profile.date <= date_to)
+    if after:
+        query = query.where(tuple_(Profile.date, TimeBreakdown.profile_id, TimeBreakdown.start) > tuple_(*after))
+
+    query = query.order_by(Profile.date, TimeBreakdown.profile_id, TimeBreakdown.start)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def report_page_query(after=None, limit=None):
+    """Report ids in keyset order: the `limit` reports after the report `after`."""
+    query = select(Profile.id).order_by(Profile.id)
+    if after is not None:
+        query = query.where(Profile.id > after)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def _report_filter(query, profile_id=None, well_pad_name=None, report_date=None, after=None, limit=None):
+    # Without a report or well pad, a page of reports (see report_page_query), or every report
+    if profile_id is not None:
+        return query.where(Profile.id == profile_id)
+    if well_pad_name is not None:
+        return query.where(Profile.well_pad_name == well_pad_name, Profile.date == report_date)
+    if after is not None or limit:
+        return query.where(Profile.id.in_(report_page_query(after, limit)))
+    return query
+
+
+def detail_query(profile_id=None, well_pad_name=None, report_date=None, after=None, limit=None):
+    """
+    Detail rows of one report by id, of a well pad's reports on one date, or
+    of a page of reports in id order when neither is given.
+
+    All lookups are served by indexes (the profile primary key, or
+    ix_profile_well_pad_name_date) and the section tables' profile_id keys.
+    """
+    query = (
+        select(*DETAIL_COLUMNS)
+        .select_from(Profile)
+        .join(AFE, AFE.profile_id == Profile.id)
+        .join(PersonnelInCharge, PersonnelInCharge.profile_id == Profile.id)
+        .join(Summary, Summary.profile_id == Profile.id)
+        .order_by(Profile.id)
+    )
+    return _report_filter(query, profile_id, well_pad_name, report_date, after, limit)
+
+
+def report_time_query(profile_id=None, well_pad_name=None, report_date=None, after=None, limit=None):
+    """The time breakdown of the same reports as detail_query, in (profile_id, start) order."""
+    query = select(TimeBreakdown.__table__).order_by(TimeBreakdown.profile_id, TimeBreakdown.start)
+    if profile_id is None and well_pad_name is None and after is None and not limit:
+        return query
+    profile_ids = _report_filter(select(Profile.id), profile_id, well_pad_name, report_date, after, limit)
+    return query.where(TimeBreakdown.profile_id.in_(profile_ids))
+
+
+def catalog_query():
+    """
+    One row per well pad: its first and last report date, report count and
+    activity row count, ordered by first report date.
+
+    The report aggregates are read from ix_profile_well_pad_name_date and
+    the row counts from the daily_progress table, never from time_breakdown.
+    """
+    activities = (
+        select(DailyProgress.well_pad_name, func.sum(DailyProgress.activities).label("activities"))
+        .group_by(DailyProgress.well_pad_name)
+        .subquery()
+    )
+    return (
+        select(
+            Profile.well_pad_name,
+            func.min(Profile.date).label("date_min"),
+            func.max(Profile.date).label("date_max"),
+            func.count().label("reports"),
+            func.coalesce(func.max(activities.c.activities), 0).label("activities"),
+        )
+        .outerjoin(activities, activities.c.well_pad_name == Profile.well_pad_name)
+        .where(Profile.well_pad_name.is_not(None))
+        .group_by(Profile.well_pad_name)
+        .order_by(func.min(Profile.date), Profile.well_pad_name)
+    )
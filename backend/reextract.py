@@ -0,0 +1,388 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import delete, exists, insert, tuple_, update
+
+from claims import INDEXED
+from daily_progress import progress_keys, refresh_daily_progress
+from data_version import bump_data_version
+from database import Profile, TimeBreakdown, UploadIndex, db, upsert
+from extraction import extract_report
+from ingest import SECTION_MODELS, TABLE_ORDER, build_rows, calculate_file_hash, calculate_hash
+
+logger = logging.getLogger(__name__)
+
+# Per-report errors kept in the run stats
+MAX_ERRORS = 100
+
+# Seconds between progress reports, besides the one after every batch
+PROGRESS_INTERVAL = 1.0
+
+
+def _parse_date(value):
+    if value in (None, ""):
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _filter_profiles(query, well_pad_name=None, date_from=None, date_to=None, profile_ids=None):
+    if well_pad_name:
+        query = query.filter(Profile.well_pad_name == well_pad_name)
+    if date_from:
+        query = query.filter(Profile.date >= _parse_date(date_from))
+    if date_to:
+        query = query.filter(Profile.date <= _parse_date(date_to))
+    if profile_ids:
+        query = query.filter(Profile.id.in_(profile_ids))
+    return query
+
+
+def _unindexed_files(upload_folder):
+    """PDFs directly in the upload folder that the upload index does not know, as (content_hash, file_path)."""
+    indexed_paths = {
+        os.path.normpath(path)
+        for (path,) in db.session.query(UploadIndex.file_path).filter(UploadIndex.file_path.isnot(None))
+    }
+    files = []
+    for name in sorted(os.listdir(upload_folder)):
+        path = os.path.join(upload_folder, name)
+        if not name.lower().endswith(".pdf") or os.path.normpath(path) in indexed_paths or not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            files.append((calculate_file_hash(f), path))
+
+    known = {
+        content_hash
+        for (content_hash,) in db.session.query(UploadIndex.content_hash)
+        .filter(UploadIndex.content_hash.in_([content_hash for content_hash, _ in files]))
+    }
+    return [(content_hash, path) for content_hash, path in files if content_hash not in known]
+
+
+def find_sources(well_pad_name=None, date_from=None, date_to=None, profile_ids=None, upload_folder=None):
+    """
+    Stored reports to re-extract.
+
+    Returns (sources, unindexed). `sources` are (profile_id, content_hash,
+    file_path) tuples; the raw table comes from the table cache or, failing
+    that, the stored PDF. `unindexed` holds the ids of the matching reports
+    that have no upload index entry, such as reports stored before the index
+    existed. With `upload_folder`, the PDFs in it that the index does not know
+    are added as sources with a profile_id of None; which report they hold is
+    only known once they are parsed (see reextract).
+    """
+    filters = dict(well_pad_name=well_pad_name, date_from=date_from, date_to=date_to, profile_ids=profile_ids)
+    query = _filter_profiles(
+        db.session.query(UploadIndex.profile_id, UploadIndex.content_hash, UploadIndex.file_path)
+        .join(Profile, Profile.id == UploadIndex.profile_id)
+        .order_by(Profile.date, Profile.id, UploadIndex.created_at.desc()),
+        **filters,
+    )
+
+    # A profile can be linked to several uploads (copies, revisions); use the latest
+    sources = {}
+    for profile_id, content_hash, file_path in query:
+        sources.setdefault(profile_id, (profile_id, content_hash, file_path))
+    sources = list(sources.values())
+
+    unindexed = {
+        profile_id
+        for (profile_id,) in _filter_profiles(
+            db.session.query(Profile.id).filter(~exists().where(UploadIndex.profile_id == Profile.id)),
+            **filters,
+        )
+    }
+    if unindexed and upload_folder and os.path.isdir(upload_folder):
+        sources.extend((None, content_hash, path) for content_hash, path in _unindexed_files(upload_folder))
+    return sources, unindexed
+
+
+def _coerce(column, value):
+    """Convert a freshly cleaned value to the column's Python type for comparison."""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    # Text columns store "" as is; other columns can only hold it as NULL
+    if value == "":
+        return value if python_type is str else None
+    if isinstance(value, str) and python_type in (int, float):
+        try:
+            return python_type(value.replace(",", ""))
+        except ValueError:
+            return value
+    return value
+
+
+def _changed(model, current, new):
+    columns = model.__table__.columns
+    return any(
+        _coerce(columns[key], value) != getattr(current, key)
+        for key, value in new.items()
+        if key in columns
+    )
+
+
+def _load_current(profile_ids):
+    current = {}
+    for model in TABLE_ORDER:
+        if model is UploadIndex:
+            continue
+        key = Profile.id if model is Profile else model.profile_id
+        current[model] = db.session.query(model).filter(key.in_(profile_ids)).all()
+    return current
+
+
+def diff_reports(results):
+    """
+    Compare re-extracted reports with the stored rows.
+
+    `results` maps profile ids to their freshly built rows (see
+    ingest.build_rows). Returns the statements to run as
+    {"insert": {model: rows}, "update": {model: rows}, "delete": [(profile_id, start)]}.
+    """
+    current = _load_current(list(results))
+    by_profile = {model: {} for model in current}
+    for model, rows in current.items():
+        for row in rows:
+            owner = row.id if model is Profile else row.profile_id
+            if model is TimeBreakdown:
+                by_profile[model].setdefault(owner, {})[row.start] = row
+            else:
+                by_profile[model][owner] = row
+
+    changes = {"insert": {}, "update": {}, "delete": []}
+    for profile_id, rows in results.items():
+        for model in [Profile] + SECTION_MODELS:
+            new = rows[model][0]
+            stored = by_profile[model].get(profile_id)
+            if stored is None:
+                changes["insert"].setdefault(model, []).append(new)
+            elif _changed(model, stored, new):
+                changes["update"].setdefault(model, []).append(new)
+
+        stored_times = by_profile[TimeBreakdown].get(profile_id, {})
+        new_times = {row["start"]: row for row in rows[TimeBreakdown]}
+        for start, new in new_times.items():
+            stored = stored_times.get(start)
+            if stored is None:
+                changes["insert"].setdefault(TimeBreakdown, []).append(new)
+            elif _changed(TimeBreakdown, stored, new):
+                changes["update"].setdefault(TimeBreakdown, []).append(new)
+        changes["delete"].extend(
+            (profile_id, start) for start in stored_times if start not in new_times
+        )
+
+    return changes
+
+
+def changed_profiles(changes):
+    """Ids of the profiles touched by a diff."""
+    profile_ids = {profile_id for profile_id, _ in changes["delete"]}
+    for rows_by_model in (changes["insert"], changes["update"]):
+        for model, rows in rows_by_model.items():
+            profile_ids.update(row["id"] if model is Profile else row["profile_id"] for row in rows)
+    return profile_ids
+
+
+def apply_changes(changes, index_rows=()):
+    """
+    Write a diff in one transaction, one bulk statement per table and operation.
+
+    `index_rows` are upload index entries recorded in the same transaction.
+    """
+    profile_ids = changed_profiles(changes)
+    try:
+        # A changed report date moves its activities to another day; refresh both
+        days = progress_keys(profile_ids)
+        if changes["delete"]:
+            db.session.execute(
+                delete(TimeBreakdown).where(
+                    tuple_(TimeBreakdown.profile_id, TimeBreakdown.start).in_(changes["delete"])
+                )
+            )
+        for model in TABLE_ORDER:
+            if changes["update"].get(model):
+                db.session.execute(update(model), changes["update"][model])
+            if changes["insert"].get(model):
+                db.session.execute(insert(model), changes["insert"][model])
+        if index_rows:
+            upsert(UploadIndex, list(index_rows))
+        refresh_daily_progress(days | progress_keys(profile_ids))
+        if profile_ids:
+            bump_data_version()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return (
+        len(changes["delete"])
+        + sum(len(rows) for rows in changes["update"].values())
+        + sum(len(rows) for rows in changes["insert"].values())
+    )
+
+
+def reextract(sources, workers, batch_size=50, template_path=None, table_cache=None, progress=None,
+              unindexed=()):
+    """
+    Re-run the cleaning over stored reports and write only the rows that changed.
+
+    Extraction runs across a process pool; diffs are written in batches of
+    `batch_size` reports. Sources without a profile id (see find_sources)
+    are only kept when they hold one of the `unindexed` reports, which are
+    then added to the upload index. Must be called inside an application
+    context. `progress` is called with the running stats after every batch
+    and at least every PROGRESS_INTERVAL seconds. Returns the final stats.
+    """
+    missing = set(unindexed)
+    stats = {
+        "total": len(sources),
+        "processed": 0,
+        "changed_reports": 0,
+        "changed_rows": 0,
+        "failed": 0,
+        "errors": [],
+        "unindexed": len(missing),
+        "unmatched": len(missing),
+        "skipped_files": 0,
+        "elapsed": 0.0,
+        "reports_per_second": 0.0,
+    }
+    started = time.monotonic()
+    reported = started
+    batch = {}
+    index_rows = []
+
+    def report():
+        nonlocal reported
+        reported = time.monotonic()
+        stats["elapsed"] = reported - started
+        stats["reports_per_second"] = stats["processed"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        stats["unmatched"] = len(missing)
+        if progress:
+            progress(stats)
+
+    def flush():
+        if batch:
+            changes = diff_reports(batch)
+            stats["changed_rows"] += apply_changes(changes, index_rows)
+            stats["changed_reports"] += len(changed_profiles(changes))
+            batch.clear()
+            index_rows.clear()
+        report()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(extract_report, file_path, template_path, table_cache, content_hash):
+                (profile_id, content_hash, file_path)
+            for profile_id, content_hash, file_path in sources
+        }
+        for future in as_completed(futures):
+            profile_id, content_hash, file_path = futures[future]
+            stats["processed"] += 1
+            try:
+                sections = future.result()
+                if sections is None:
+                    raise ValueError("No tables found")
+
+                rows = build_rows({"sections": sections}, calculate_hash(sections[0]))
+                if profile_id is None:
+                    # A PDF the upload index does not know; keep it if it holds a report missing from the index
+                    if rows[Profile][0]["id"] not in missing:
+                        raise ValueError("Not one of the unindexed reports")
+                    profile_id = rows[Profile][0]["id"]
+                    missing.discard(profile_id)
+                    index_rows.append({
+                        "content_hash": content_hash,
+                        "profile_id": profile_id,
+                        "filename": os.path.basename(file_path),
+                        "file_path": file_path,
+                        "created_at": datetime.utcnow(),
+                        "status": INDEXED,
+                    })
+                elif rows[Profile][0]["id"] != profile_id:
+                    raise ValueError(
+                        f"Cleaning now yields profile id {rows[Profile][0]['id']}; re-upload the report instead"
+                    )
+                batch[profile_id] = rows
+            except Exception as e:
+                if profile_id is None:
+                    stats["skipped_files"] += 1  # Other PDFs in the upload folder are not errors
+                else:
+                    stats["failed"] += 1
+                    if len(stats["errors"]) < MAX_ERRORS:
+                        stats["errors"].append({"profile_id": profile_id, "message": str(e)})
+
+            if len(batch) >= batch_size:
+                flush()
+            elif time.monotonic() - reported >= PROGRESS_INTERVAL:
+                report()
+
+    flush()
+    if missing:
+        logger.warning(
+            "%d reports have no upload index entry and no matching PDF in the upload folder; "
+            "they were not re-extracted",
+            len(missing),
+        )
+    return stats
+
+
+class ReextractRuns:
+    """Background re-extraction runs started from the admin endpoint."""
+
+    def __init__(self, app, table_cache=None):
+        self.app = app
+        self.table_cache = table_cache
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def start(self, filters, workers, batch_size):
+        run_id = uuid.uuid4().hex
+        with self._lock:
+            self._runs[run_id] = {"run_id": run_id, "status": "running", "filters": filters}
+
+        thread = threading.Thread(
+            target=self._run, args=(run_id, filters, workers, batch_size), daemon=True
+        )
+        thread.start()
+        return self.get(run_id)
+
+    def get(self, run_id):
+        with self._lock:
+            run = self._runs.get(run_id)
+            return dict(run, errors=list(run.get("errors", []))) if run else None
+
+    def _update(self, run_id, **fields):
+        # The run keeps appending to the stats' errors; store a snapshot of them
+        if "errors" in fields:
+            fields["errors"] = list(fields["errors"])
+        with self._lock:
+            self._runs[run_id].update(fields)
+
+    def _run(self, run_id, filters, workers, batch_size):
+        try:
+            with self.app.app_context():
+                sources, unindexed = find_sources(**filters, upload_folder=self.app.config["UPLOAD_FOLDER"])
+                self._update(run_id, total=len(sources), unindexed=len(unindexed))
+                stats = reextract(
+                    sources,
+                    workers,
+                    batch_size,
+                    template_path=self.app.config.get("REPORT_TEMPLATE"),
+                    table_cache=self.table_cache,
+                    progress=lambda stats: self._update(run_id, **stats),
+                    unindexed=unindexed,
+                )
+            self._update(run_id, status="done", **stats)
+        except Exception as e:
+            self._update(run_id, status="failed", message=str(e))
+
@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import Response, current_app, request
+
+from data_version import current_data_version
+
+CachedResponse = namedtuple("CachedResponse", ["body", "headers"])
+
+
+class ResponseCache:
+    """
+    In-memory LRU of serialized responses, bounded by their total body size.
+
+    Keys include the data version, so entries never go stale; entries of old
+    versions are simply no longer requested and age out. Bodies larger than
+    `max_entry_bytes` (a quarter of the cache by default) are not kept.
+    Streamed bodies are buffered while they are sent, so they are only kept
+    up to the much smaller `max_stream_bytes`, which bounds the memory each
+    streaming request holds.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes=None, max_stream_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self.max_stream_bytes = min(max_stream_bytes, self.max_entry_bytes)
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self.entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def tee(self, key, chunks, headers):
+        """Pass a streamed body through, caching it once it has been sent in full."""
+        body = []
+        size = 0
+        try:
+            for chunk in chunks:
+                if body is not None:
+                    size += len(chunk)
+                    if size <= self.max_stream_bytes:
+                        body.append(chunk)
+                    else:
+                        body = None  # Too large to keep; the rest is passed through unbuffered
+                yield chunk
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+        if body is not None:
+            self.put(key, CachedResponse(b"".join(body), headers))
+
+
+def cached(cache):
+    """
+    Serve a GET view from `cache`, with an ETag derived from the data version.
+
+    The key is the path, the query parameters, the Accept and Accept-Encoding
+    headers and the data version. Clients repeating the ETag in If-None-Match
+    get a 304 without the view running. Only 200 responses are cached;
+    streamed ones once they have been sent completely.
+    """
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            version = current_data_version()
+            key = (
+                request.path,
+                tuple(sorted(request.args.items(multi=True))),
+                request.headers.get("Accept", ""),
+                request.headers.get("Accept-Encoding", ""),
+                version,
+            )
+            etag = hashlib.sha1(repr(key).encode()).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            entry = cache.get(key)
+            if entry is not None:
+                response = Response(entry.body, headers=entry.headers)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    response.response = cache.tee(key, response.response, list(response.headers))
+                else:
+                    cache.put(key, CachedResponse(response.get_data(), list(response.headers)))
+
+            response.set_etag(etag)
+            return response
+        return wrapper
+    return decorate
@@ -0,0 +1,42 @@
+from sqlalchemy import inspect, text
+
+from database import db
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current models.
+
+    db.create_all only creates missing tables. This also adds the columns
+    and indexes that were added to existing models since the tables were
+    created. New columns must be nullable or have a server default, which
+    existing rows get. Must be called inside an application context. Returns
+    what was added.
+    """
+    db.create_all()
+
+    engine = db.engine
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                definition = f"{preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    definition += f" DEFAULT {getattr(default, 'text', default)}"
+                if not column.nullable:
+                    definition += " NOT NULL"
+                connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {definition}"))
+                added.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    added.append(index.name)
+    return added
@@ -0,0 +1,79 @@
+import json
+import zlib
+
+from flask import Response, current_app, request, stream_with_context
+
+from database import db
+
+# Rows fetched per round trip from the server-side cursor
+FETCH_SIZE = 1000
+# Encoded JSON is sent in chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024
+
+
+def stream_rows(query):
+    """
+    Execute `query` with a server-side cursor, fetching FETCH_SIZE rows at a time.
+
+    The statement runs right away, so SQL errors surface before the response
+    starts; the rows are only fetched while the response is being sent.
+    """
+    return db.session.execute(query.execution_options(yield_per=FETCH_SIZE))
+
+
+def _encode(value):
+    # Same representation as jsonify, so streamed and buffered responses match
+    provider = current_app.json
+    return json.dumps(
+        value, default=provider.default, sort_keys=provider.sort_keys, ensure_ascii=provider.ensure_ascii
+    )
+
+
+def json_array(rows, to_dict=lambda row: dict(row._mapping)):
+    """Encode rows as a JSON array, one chunk of about CHUNK_BYTES at a time."""
+    buffer = ["["]
+    size = 1
+    for position, row in enumerate(rows):
+        text = ("," if position else "") + _encode(to_dict(row))
+        buffer.append(text)
+        size += len(text)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    buffer.append("]")
+    yield "".join(buffer).encode()
+
+
+def json_object(arrays):
+    """Encode {name: rows} as a JSON object of arrays, streaming each array in turn."""
+    for position, (name, chunks) in enumerate(arrays.items()):
+        yield (("," if position else "{") + _encode(name) + ":").encode()
+        yield from chunks
+    yield b"}" if arrays else b"{}"
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_response(chunks, mimetype="application/json"):
+    """
+    Response sending `chunks` (bytes) as they are produced.
+
+    The body is gzip-compressed on the fly when the client accepts it. The
+    application context is kept until the stream ends, so `chunks` may keep
+    reading from the database session.
+    """
+    compress = "gzip" in request.accept_encodings
+    if compress:
+        chunks = _gzip(chunks)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+
+
+class TableCache:
+    """
+    Disk cache of raw extracted report tables, keyed by the PDF content hash.
+
+    Tables are stored as Parquet files in `folder`. When the cache grows past
+    `max_bytes`, the least recently used files are evicted. Reads refresh a
+    file's mtime, which is what the eviction order is based on. The object is
+    plain data, so it can be passed to the worker processes.
+    """
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    def _path(self, content_hash):
+        return os.path.join(self.folder, f"{content_hash}.parquet")
+
+    def get(self, content_hash):
+        """Return the cached table DataFrame, or None on a miss."""
+        path = self._path(content_hash)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        # Parquet needs string column names; restore Camelot's positional ones
+        df.columns = [int(column) for column in df.columns]
+        return df
+
+    def put(self, content_hash, df):
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._path(content_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+
+        stored = df.copy()
+        stored.columns = [str(column) for column in stored.columns]
+        stored.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used tables until the cache fits its budget."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(".parquet"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Evicted by another worker
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
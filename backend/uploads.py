@@ -0,0 +1,177 @@
+import fcntl
+import json
+import os
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+# Bytes copied from the request stream to disk at a time
+COPY_BUFFER_SIZE = 1 << 20
+
+# Suggested chunk size for clients
+CHUNK_SIZE = 8 << 20
+
+# Unfinished uploads older than this (seconds) are discarded
+PARTIAL_RETENTION = 7 * 24 * 60 * 60
+
+
+class UploadError(Exception):
+    """A chunked upload request that cannot be honoured, with its HTTP status."""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+class ChunkedUploads:
+    """
+    Resumable chunked uploads streamed to disk.
+
+    Each upload is a `<id>.part` file plus a `<id>.json` sidecar holding the
+    original filename and declared size under `<folder>/.partial`. The number
+    of bytes already on disk is the acknowledged offset, so an interrupted
+    client asks for the status and resumes from there.
+
+    Writers take an exclusive flock on the `.part` file and check the offset
+    under it, so a resent chunk that reaches another worker while the first
+    copy is still streaming waits and is then rejected instead of appended.
+    """
+
+    def __init__(self, folder, max_size):
+        self.folder = folder
+        self.partial_folder = os.path.join(folder, ".partial")
+        self.max_size = max_size
+
+    def _paths(self, upload_id):
+        # Ids are generated by us; reject anything that could escape the folder
+        if not upload_id.isalnum():
+            raise UploadError("Upload not found", 404)
+        base = os.path.join(self.partial_folder, upload_id)
+        return f"{base}.part", f"{base}.json"
+
+    def _open_locked(self, upload_id):
+        # The lock is held until the returned file is closed, across processes
+        part_path, _ = self._paths(upload_id)
+        try:
+            f = open(part_path, "r+b")
+        except OSError:
+            raise UploadError("Upload not found", 404)
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _expire(self):
+        # Expire each upload as a whole, by its most recently written file
+        now = time.time()
+        last_written = {}
+        for name in os.listdir(self.partial_folder):
+            upload_id = os.path.splitext(name)[0]
+            try:
+                mtime = os.path.getmtime(os.path.join(self.partial_folder, name))
+            except OSError:
+                continue
+            last_written[upload_id] = max(mtime, last_written.get(upload_id, 0))
+
+        for upload_id, mtime in last_written.items():
+            if now - mtime > PARTIAL_RETENTION and upload_id.isalnum():
+                self.discard(upload_id)
+
+    def init(self, filename, size):
+        """Register a new upload and return its state."""
+        if not filename or not filename.endswith(".pdf"):
+            raise UploadError("Invalid file type, not a PDF")
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError("A positive file size is required")
+        if size > self.max_size:
+            raise UploadError(f"File exceeds the maximum upload size of {self.max_size} bytes", 413)
+
+        os.makedirs(self.partial_folder, exist_ok=True)
+        self._expire()
+
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        with open(meta_path, "w") as f:
+            json.dump({"filename": filename, "size": size}, f)
+        open(part_path, "wb").close()
+
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        """Return the upload's filename, declared size and acknowledged offset."""
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            offset = os.path.getsize(part_path)
+        except (OSError, ValueError):
+            raise UploadError("Upload not found", 404)
+
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "offset": offset,
+            "chunk_size": CHUNK_SIZE,
+        }
+
+    def append(self, upload_id, offset, stream):
+        """
+        Stream one chunk from `stream` to disk, starting at `offset`.
+
+        The offset must equal the bytes already received, so a resent chunk
+        cannot be written twice. Returns the updated status.
+        """
+        with self._open_locked(upload_id) as f:
+            # Checked under the lock: a concurrent copy of this chunk has landed by now
+            state = self.status(upload_id)
+            if offset != state["offset"]:
+                raise UploadError("Offset does not match the received bytes", 409, offset=state["offset"])
+
+            remaining = state["size"] - offset
+            f.seek(offset)
+            try:
+                while True:
+                    chunk = stream.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    if len(chunk) > remaining:
+                        # Keep what fits the declared size; the client can't exceed it
+                        f.write(chunk[:remaining])
+                        raise UploadError("Chunk exceeds the declared file size", 413)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            finally:
+                f.flush()
+                os.fsync(f.fileno())
+
+            return self.status(upload_id)
+
+    def finalize(self, upload_id):
+        """
+        Move a fully received upload into the upload folder.
+
+        Returns the original filename and the stored file path.
+        """
+        with self._open_locked(upload_id):
+            state = self.status(upload_id)
+            if state["offset"] != state["size"]:
+                raise UploadError("Upload is incomplete", 409, offset=state["offset"])
+
+            part_path, meta_path = self._paths(upload_id)
+            file_path = os.path.join(
+                self.folder, f"{upload_id}_{secure_filename(state['filename'])}"
+            )
+            os.replace(part_path, file_path)
+            os.remove(meta_path)
+
+        return state["filename"], file_path
+
+    def discard(self, upload_id):
+        """Delete an unfinished upload."""
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
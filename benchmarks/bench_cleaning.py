@@ -0,0 +1,162 @@
+"""
+Offline benchmark of the drilling report cleaning functions.
+
+    python benchmarks/bench_cleaning.py                      # compare with baseline.json
+    python benchmarks/bench_cleaning.py --save-baseline      # record a new baseline
+    python benchmarks/bench_cleaning.py --activities 24 96 288 --noise 0.2
+
+Each section helper of ocr.py is timed separately on synthetic tables (see
+synthetic.py), with the section locator built once as in
+cleaning_drilling_report_1, plus the locator itself and the whole
+cleaning end to end. No PDFs or database are needed.
+
+Timings are the best of `--repeat` runs, in milliseconds per call. When a
+baseline exists, every case is printed with its change against it, and with
+--fail-on-regression the exit code is 1 if any case got slower than the
+threshold. Baselines only compare on the same machine and Python/pandas
+versions.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+import ocr  # noqa: E402
+from synthetic import make_report_table  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+HELPERS = {
+    'profile': ocr.cleaning_profile,
+    'general': ocr.cleaning_general,
+    'drilling_parameter': ocr.cleaning_drilling_parameter,
+    'afe': ocr.cleaning_afe,
+    'personnel_in_charge': ocr.cleaning_personnel_in_charge,
+    'summary': ocr.cleaning_summary,
+    'time_breakdown': ocr.cleaning_time_breakdown,
+}
+
+
+def check_table(df, n_activities):
+    """Fail early if the synthetic layout no longer matches what the cleaning expects."""
+    profile, general, drilling_parameter, afe, personnel, summary, time_breakdown = (
+        ocr.cleaning_drilling_report_1(df)
+    )
+    problems = []
+    if profile.get('report_no') is None or profile.get('date') is None:
+        problems.append('profile')
+    if len(general) != 10 or len(drilling_parameter) != 10:
+        problems.append('general/drilling parameters')
+    if len(afe) != 5:
+        problems.append('afe')
+    if len(personnel) != 5:
+        problems.append('personnel in charge')
+    if summary.get('status') != 'DRILLING':
+        problems.append('summary')
+    if len(time_breakdown) != n_activities:
+        problems.append('time breakdown')
+    if problems:
+        raise SystemExit(f'Synthetic table is not parsed as expected: {", ".join(problems)}')
+
+
+def _best(func, repeat):
+    # Auto-range the loop count so each sample runs for at least ~0.2s
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def run(activities, noise, repeat, seed):
+    """Time every case for each table size; returns {case_name: ms_per_call}."""
+    results = {}
+    for n in activities:
+        df = make_report_table(n_activities=n, noise=noise, seed=seed)
+        check_table(df, n)
+        locator = ocr.SectionLocator(df)
+
+        cases = {'locator': lambda: ocr.SectionLocator(df)}
+        for name, helper in HELPERS.items():
+            cases[name] = lambda helper=helper: helper(df, locator)
+        cases['end_to_end'] = lambda: ocr.cleaning_drilling_report_1(df)
+
+        for name, func in cases.items():
+            results[f'{name}[{n}]'] = _best(func, repeat)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def report(results, baseline, threshold):
+    """Print the results next to the baseline and return the names of regressed cases."""
+    regressions = []
+    width = max(len(name) for name in results)
+    for name, ms in results.items():
+        line = f'{name:<{width}}  {ms:10.3f} ms'
+        previous = baseline.get(name)
+        if previous:
+            change = (ms - previous) / previous
+            line += f'  {previous:10.3f} ms  {change:+7.1%}'
+            if change > threshold:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the drilling report cleaning functions.')
+    parser.add_argument('--activities', type=int, nargs='+', default=[24, 96, 288],
+                        help='Time breakdown lengths to benchmark (1-288)')
+    parser.add_argument('--noise', type=float, default=0.1,
+                        help='Probability of messy text in an activity row')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing samples per case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative slowdown reported as a regression (default: 0.2)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = run(args.activities, args.noise, args.repeat, args.seed)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored['results']
+        if stored.get('environment') != environment():
+            print(f'Baseline was recorded on {stored.get("environment")}; comparisons are indicative only')
+
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'environment': environment(),
+                'settings': {'noise': args.noise, 'repeat': args.repeat, 'seed': args.seed},
+                'results': results,
+            }, f, indent=2)
+        print(f'Baseline written to {args.baseline}')
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
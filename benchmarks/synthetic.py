@@ -0,0 +1,166 @@
+"""
+Synthetic drilling report tables in the layout cleaning_drilling_report_1 expects.
+
+The generated DataFrame has the shape Camelot produces for a daily drilling
+report: string cells, a positional RangeIndex/columns, the profile block in
+column 0, GENERAL / DRILLING PARAMETERS / AFE / PERSONNEL IN CHARGE side by
+side, the 24 hours summary in column 4, and the time breakdown grid at the
+bottom, closed by a TOTAL HRS row.
+"""
+import random
+
+import pandas as pd
+
+N_COLUMNS = 9
+
+GENERAL = [
+    ('RIG TYPE / NAME', 'LAND RIG / SKYTOP-01'),
+    ('RIG POWER', '1500 HP'),
+    ('KB ELEVATION', '12.5'),
+    ('MIDNIGHT DEPTH', '1,850.0'),
+    ('PROGRESS', '150.0'),
+    ('PROPOSED TD', '2,500.0'),
+    ('SPUD DATE', '01-Jan-24'),
+    ('RELEASE DATE', ''),
+    ('PLANNED DAYS', '30'),
+    ('DAYS FROM RIG RELEASE', '4'),
+]
+
+DRILLING_PARAMETERS = [
+    ('AVERAGE WOB 24 HRS', '25 / 30'),
+    ('AVERAGE ROP 24 HRS', '15.2'),
+    ('AVERAGE SURFACE RPM / DHM', '120 / 80'),
+    ('ON / OFF BOTTOM TORQUE', '5,000 / 3,000'),
+    ('FLOWRATE / SPP', '600 / 1,500'),
+    ('AIR RATE', '0'),
+    ('CORR. INHIB / FOAM RATE', '0 / 0'),
+    ('PUW / SOW / ROTW', '150 / 120 / 135'),
+    ('TOTAL DRILLING TIME', '10.5'),
+    ('TON MILES', '45.2'),
+]
+
+AFE = [
+    'AFE NUMBER / AFE COST\nUSD 4,500,000.00',
+    'DAILY COST\nUSD 85,000.00',
+    '% AFE / CUMULATIVE COST\n35.5%\nUSD 1,600,000.00',
+    'DAILY MUD COST\nUSD 5,000.00',
+    'CUMULATIVE MUD COST\nUSD 60,000.00',
+]
+
+PERSONNEL = [
+    'DAY/ NIGHT DRILLING SUPV.\nJOHN DOE / JANE ROE',
+    'BUDI SANTOSO\nDRILLING SUPERINTENDENT',
+    'RIG SUPERINTENDENT\nANDI WIJAYA',
+    'DRILLING ENGINEER\nRINA PUTRI',
+    'DEWI LESTARI\nHSE SUPERVISOR',
+]
+
+TIME_HEADER = ['START', 'END', 'ELAPSED', 'DEPTH', 'PHASE', 'PT/NPT', 'CODE', 'DESCRIPTION', 'OPERATION']
+
+DESCRIPTIONS = [
+    'DRILL 12-1/4" HOLE SECTION',
+    'CIRCULATE BOTTOMS UP',
+    'POOH TO SHOE',
+    'WAIT ON WEATHER',
+    'REPAIR TOP DRIVE',
+    'RIH WITH BHA',
+    'SURVEY',
+]
+
+# Row layout; the cleaning helpers slice relative to these anchors
+HEADER_ROW = 4
+AFE_ROWS = range(5, 10)
+PERSONNEL_ROW = 10
+PERSONNEL_ROWS = range(11, 16)
+SUMMARY_ROW = 16
+STATUS_ROW = 18
+TIME_HEADER_ROW = 19
+
+
+def _clock(minutes):
+    return '24:00' if minutes == 1440 else f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def _activities(n, noise, rng):
+    # Distinct 5-minute boundaries, so START values stay unique like in real reports
+    if not 1 <= n <= 288:
+        raise ValueError('Between 1 and 288 activities fit in 24 hours at 5-minute resolution')
+    cuts = sorted(rng.sample(range(5, 1440, 5), n - 1))
+    bounds = [0] + cuts + [1440]
+
+    depth = rng.uniform(500, 3000)
+    rows = []
+    for start, end in zip(bounds, bounds[1:]):
+        npt = rng.random() < 0.15
+        if not npt:
+            depth += rng.uniform(0, 30)
+
+        description = rng.choice(DESCRIPTIONS)
+        depth_text = f'{depth:,.1f}'
+        if rng.random() < noise:
+            # Camelot output is messy: wrapped text, stray spaces, missing depths
+            description = description.replace(' ', '\n', 1) + '  '
+            depth_text = '' if rng.random() < 0.5 else depth_text
+        rows.append([
+            _clock(start),
+            _clock(end),
+            f'{(end - start) / 60:.2f}',
+            depth_text,
+            'INT',
+            'NPT' if npt else 'PT',
+            rng.choice(['2A', '5B', '6', '8', '21']),
+            description,
+            'DRLG' if not npt else 'WOW',
+        ])
+    return rows
+
+
+def make_report_table(n_activities=24, noise=0.0, seed=0, report_no=12, well_pad_name='PAD-A1'):
+    """
+    Build one synthetic raw report table.
+
+    Parameters:
+    - n_activities: Number of time breakdown rows (1-288).
+    - noise: Probability (0-1) of messy text in an activity row.
+    - seed: Random seed, so benchmark inputs are reproducible.
+    """
+    rng = random.Random(seed)
+    activities = _activities(n_activities, noise, rng)
+
+    n_rows = TIME_HEADER_ROW + 1 + len(activities) + 1
+    grid = [[''] * N_COLUMNS for _ in range(n_rows)]
+
+    grid[0][0] = 'DAILY DRILLING REPORT DATE 05-Jan-24'
+    grid[1][0] = f'OPERATOR PT ENERGI NUSANTARA CONTRACTOR PT RIG INDONESIA REPORT NO. # {report_no}'
+    grid[2][0] = f'WELL/ PAD NAME {well_pad_name} FIELD RANTAU'
+    grid[3][0] = (
+        'WELL TYPE/ PROFILE DEVELOPMENT / J-TYPE LATITUDE/ LONGITUDE 4.1N / 98.2E '
+        'GL - MSL (M) 25.4 ENVIRONTMENT ONSHORE'
+    )
+
+    grid[HEADER_ROW][0] = 'GENERAL'
+    grid[HEADER_ROW][3] = 'DRILLING PARAMETERS'
+    grid[HEADER_ROW][5] = 'AFE'
+    for i, ((general_label, general_value), (parameter_label, parameter_value)) in enumerate(
+        zip(GENERAL, DRILLING_PARAMETERS)
+    ):
+        row = grid[HEADER_ROW + 1 + i]
+        row[0], row[1] = general_label, general_value
+        row[3], row[4] = parameter_label, parameter_value
+
+    for row, text in zip(AFE_ROWS, AFE):
+        grid[row][5] = text
+    grid[PERSONNEL_ROW][5] = 'PERSONNEL IN CHARGE'
+    for row, text in zip(PERSONNEL_ROWS, PERSONNEL):
+        grid[row][5] = text
+
+    grid[SUMMARY_ROW][0], grid[SUMMARY_ROW][4] = '24 HOURS SUMMARY', 'DRILLED 12-1/4" HOLE\nFROM 1,700 M TO 1,850 M'
+    grid[SUMMARY_ROW + 1][0], grid[SUMMARY_ROW + 1][4] = '24 HOURS FORECAST', 'CONTINUE DRILLING TO 2,000 M'
+    grid[STATUS_ROW][0], grid[STATUS_ROW][4] = 'STATUS', 'DRILLING'
+
+    grid[TIME_HEADER_ROW] = list(TIME_HEADER)
+    for i, activity in enumerate(activities):
+        grid[TIME_HEADER_ROW + 1 + i] = activity
+    grid[-1][0], grid[-1][2] = 'TOTAL HRS', '24.0'
+
+    return pd.DataFrame(grid)
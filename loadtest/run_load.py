@@ -0,0 +1,356 @@
+"""
+Offline load test of the backend API.
+
+    python loadtest/run_load.py                                   # SQLite, default mix, 30s
+    python loadtest/run_load.py --wells 20 --days 90 --concurrency 16 --duration 60
+    python loadtest/run_load.py --mix time_breakdown=5,detail=3,upload=1 --no-cache
+    python loadtest/run_load.py --database-url postgresql://localhost/loadtest --memory
+
+Seeds a throwaway database (a temporary SQLite file unless --database-url
+points at a scratch Postgres) with synthetic well pads through the normal
+ingestion path (see seed.py). It then serves backend/app.py on a local port
+and runs `--concurrency` client threads for `--duration` seconds. Each thread
+picks its next request from the weighted `--mix` of scenarios.
+
+The report lists, per scenario, the request count, errors, throughput,
+latency percentiles and mean response size, plus the peak RSS of the
+process. With --memory, every scenario is afterwards run alone through
+Flask's test client under tracemalloc, to measure the peak Python memory the
+server allocates for a single request. The response body is consumed chunk by
+chunk, so an HTTP client's buffers are not counted.
+
+Uploads send synthetic, unique PDFs without tables. The request latency
+covers hashing, claiming, storing and queueing. Their background jobs fail
+quickly in extraction. Pass --upload-file to send a real report instead,
+made unique by a trailing comment. No network access is needed.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+import requests
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(LOADTEST_DIR, '..', 'backend'))
+
+DEFAULT_MIX = 'time_breakdown=4,detail=3,detail_by_id=2,upload=1'
+PERCENTILES = [50, 90, 95, 99]
+
+
+def _configure(args, workdir):
+    # The app reads its settings from the environment at import time
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{os.path.join(workdir, "loadtest.db")}'
+    os.environ['UPLOAD_FOLDER'] = os.path.join(workdir, 'uploads')
+    os.environ['INGEST_WORKERS'] = str(args.ingest_workers)
+    os.environ['RESPONSE_CACHE_MAX_BYTES'] = '0' if args.no_cache else str(256 * 1024 * 1024)
+
+
+class Targets:
+    """Well pads, dates and report ids of the seeded data, to build request parameters from."""
+
+    def __init__(self, reports, upload_file=None):
+        self.reports = reports  # (profile_id, well_pad_name, date)
+        self.well_pads = sorted({well_pad for _, well_pad, _ in reports})
+        self.dates = sorted({report_date for _, _, report_date in reports})
+        self.upload_bytes = None
+        if upload_file:
+            with open(upload_file, 'rb') as f:
+                self.upload_bytes = f.read()
+
+    def report(self, rng):
+        return rng.choice(self.reports)
+
+    def date_window(self, rng, max_days=14):
+        first = rng.randrange(len(self.dates))
+        last = min(len(self.dates) - 1, first + rng.randrange(max_days))
+        return self.dates[first].isoformat(), self.dates[last].isoformat()
+
+    def pdf(self):
+        marker = f'\n% loadtest {uuid.uuid4().hex}\n'.encode()
+        if self.upload_bytes:
+            return self.upload_bytes + marker
+        return b'%PDF-1.4' + marker + b'1 0 obj\n<< /Type /Catalog >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n'
+
+
+def _time_breakdown(session, base_url, targets, rng):
+    date_from, date_to = targets.date_window(rng)
+    return session.get(f'{base_url}/time_breakdown', params={
+        'well_pad_name': rng.choice(targets.well_pads),
+        'date_from': date_from,
+        'date_to': date_to,
+        'limit': rng.choice([500, 2000, 5000]),
+    })
+
+
+def _time_breakdown_arrow(session, base_url, targets, rng):
+    date_from, date_to = targets.date_window(rng)
+    return session.get(f'{base_url}/time_breakdown', params={
+        'well_pad_name': rng.choice(targets.well_pads),
+        'date_from': date_from,
+        'date_to': date_to,
+        'limit': 5000,
+        'format': 'arrow',
+    })
+
+
+def _detail(session, base_url, targets, rng):
+    _, well_pad, report_date = targets.report(rng)
+    return session.get(f'{base_url}/detail', params={'well_pad_name': well_pad, 'date': report_date.isoformat()})
+
+
+def _detail_by_id(session, base_url, targets, rng):
+    profile_id, _, _ = targets.report(rng)
+    return session.get(f'{base_url}/detail/{profile_id}')
+
+
+def _catalog(session, base_url, targets, rng):
+    return session.get(f'{base_url}/catalog')
+
+
+def _depth_curve(session, base_url, targets, rng):
+    date_from, date_to = targets.date_window(rng, max_days=60)
+    return session.get(f'{base_url}/analytics/depth_curve', params={
+        'well_pad_name': rng.choice(targets.well_pads), 'date_from': date_from, 'date_to': date_to,
+    })
+
+
+def _upload(session, base_url, targets, rng):
+    files = {'files': (f'loadtest_{uuid.uuid4().hex[:8]}.pdf', targets.pdf(), 'application/pdf')}
+    return session.post(f'{base_url}/upload', files=files)
+
+
+SCENARIOS = {
+    'time_breakdown': _time_breakdown,
+    'time_breakdown_arrow': _time_breakdown_arrow,
+    'detail': _detail,
+    'detail_by_id': _detail_by_id,
+    'catalog': _catalog,
+    'depth_curve': _depth_curve,
+    'upload': _upload,
+}
+
+
+def parse_mix(value):
+    """'name=weight,...' into {scenario: weight}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    """Latency, status and size of every request, per scenario. Thread safe."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, scenario, seconds, ok, size):
+        with self.lock:
+            self.samples.setdefault(scenario, []).append((seconds, ok, size))
+
+
+def _client(base_url, targets, mix, recorder, deadline, seed):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    with requests.Session() as session:
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = SCENARIOS[scenario](session, base_url, targets, rng)
+                ok, size = response.status_code < 400, len(response.content)
+            except requests.RequestException:
+                ok, size = False, 0
+            recorder.add(scenario, time.perf_counter() - started, ok, size)
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(recorder, elapsed):
+    results = {}
+    for scenario, samples in sorted(recorder.samples.items()):
+        latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+        results[scenario] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok, _ in samples if not ok),
+            'throughput_rps': len(samples) / elapsed,
+            **{f'p{pct}_ms': percentile(latencies, pct) for pct in PERCENTILES},
+            'max_ms': latencies[-1],
+            'mean_kb': sum(size for _, _, size in samples) / len(samples) / 1024,
+        }
+    return results
+
+
+class TestClientSession:
+    """The part of requests.Session the scenarios use, over the app's test client (no HTTP)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, url, params=None):
+        # Unbuffered, so the body is only generated while the caller iterates it
+        return self.client.get(url, query_string=params, buffered=False)
+
+    def post(self, url, files=None):
+        data = {
+            field: (io.BytesIO(content), filename, mimetype)
+            for field, (filename, content, mimetype) in (files or {}).items()
+        }
+        return self.client.post(url, data=data, buffered=False)
+
+
+def measure_memory(app, targets, mix, samples, seed):
+    """Peak traced Python memory the server allocates for a single request, per scenario, in MB."""
+    rng = random.Random(seed)
+    session = TestClientSession(app)
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for scenario in mix:
+            peak = 0
+            for _ in range(samples):
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                response = SCENARIOS[scenario](session, '', targets, rng)
+                for _ in response.response:
+                    pass  # Drop each chunk, as the server does once it is sent
+                response.close()
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+            peaks[scenario] = peak / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def report(results, elapsed, memory):
+    columns = ['requests', 'errors', 'throughput_rps'] + [f'p{pct}_ms' for pct in PERCENTILES] + ['max_ms', 'mean_kb']
+    width = max([len('scenario')] + [len(name) for name in results])
+    print(f'{"scenario":<{width}}  ' + '  '.join(f'{column:>14}' for column in columns)
+          + ('  peak_mem_mb' if memory else ''))
+    for scenario, stats in results.items():
+        line = f'{scenario:<{width}}  ' + '  '.join(
+            f'{stats[column]:>14}' if isinstance(stats[column], int) else f'{stats[column]:>14.2f}'
+            for column in columns
+        )
+        if memory:
+            line += f'  {memory.get(scenario, 0):>11.2f}'
+        print(line)
+
+    total = sum(stats['requests'] for stats in results.values())
+    print(f'{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), peak RSS {peak_rss_mb():.0f} MB')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the backend API against a local database.')
+    parser.add_argument('--database-url', help='Scratch database to use instead of a temporary SQLite file')
+    parser.add_argument('--no-seed', action='store_true', help='Use the data already in --database-url')
+    parser.add_argument('--wells', type=int, default=5, help='Synthetic well pads to seed')
+    parser.add_argument('--days', type=int, default=30, help='Reports (days) per well pad')
+    parser.add_argument('--activities', type=int, default=24, help='Time breakdown rows per report')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Weighted scenarios (default: {DEFAULT_MIX}); available: {", ".join(SCENARIOS)}')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache')
+    parser.add_argument('--ingest-workers', type=int, default=2, help='Extraction processes for uploads')
+    parser.add_argument('--upload-file', help='Real report PDF to upload instead of synthetic PDFs')
+    parser.add_argument('--memory', action='store_true', help='Measure peak memory per request and scenario')
+    parser.add_argument('--memory-samples', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.no_seed and not args.database_url:
+        parser.error('--no-seed needs --database-url')
+
+    with tempfile.TemporaryDirectory(prefix='loadtest_') as workdir:
+        _configure(args, workdir)
+
+        from werkzeug.serving import make_server
+
+        from app import app
+        from database import Profile, db
+        from schema import upgrade_schema
+        from seed import seed
+
+        with app.app_context():
+            upgrade_schema()
+            if not args.no_seed:
+                started = time.monotonic()
+                stored = seed(
+                    args.wells, args.days, args.activities, seed=args.seed,
+                    progress=lambda count: print(f'\rSeeded {count} reports', end='', flush=True),
+                )
+                print(f'\rSeeded {stored} reports ({stored * args.activities} activities) '
+                      f'in {time.monotonic() - started:.1f}s', flush=True)
+            reports = db.session.query(Profile.id, Profile.well_pad_name, Profile.date).all()
+        if not reports:
+            raise SystemExit('The database holds no reports to query')
+        targets = Targets([tuple(row) for row in reports], args.upload_file)
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        try:
+            recorder = Recorder()
+            started = time.monotonic()
+            deadline = started + args.duration
+            clients = [
+                threading.Thread(
+                    target=_client, args=(base_url, targets, args.mix, recorder, deadline, args.seed + index)
+                )
+                for index in range(args.concurrency)
+            ]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.monotonic() - started
+        finally:
+            server.shutdown()
+
+        memory = measure_memory(app, targets, args.mix, args.memory_samples, args.seed) if args.memory else {}
+
+        results = summarize(recorder, elapsed)
+        report(results, elapsed, memory)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({
+                    'settings': {key: value for key, value in vars(args).items() if key != 'json'},
+                    'elapsed_s': elapsed,
+                    'peak_rss_mb': peak_rss_mb(),
+                    'results': results,
+                    'peak_request_memory_mb': memory,
+                }, f, indent=2, default=str)
+            print(f'Results written to {args.json}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Synthetic reports for the load test, written through the normal ingestion path.
+
+Each well pad gets one report per day. Every report has the usual sections
+and `activities` time breakdown rows, with a depth that keeps increasing,
+PT/NPT flags and activity codes. Reports are stored with
+ingest.save_reports, so the typed columns, daily_progress and the data
+version are maintained exactly as for uploaded PDFs.
+"""
+import random
+from datetime import date, timedelta
+
+from ingest import save_reports
+
+NPT_CODES = ['2A', '2B', '6C', '8D', '9A']
+PT_CODES = ['1A', '1B', '3A', '4B', '5C']
+DESCRIPTIONS = [
+    'Drill 12-1/4" hole section',
+    'Circulate hole clean',
+    'POOH to change BHA',
+    'Wait on weather',
+    'Repair top drive',
+    'Run casing',
+]
+
+
+def well_pad_name(index):
+    return f'LOADTEST-PAD-{index + 1:03d}'
+
+
+def make_sections(well_index, day_index, start_date, activities, depth, rng, n_days):
+    """The seven cleaned sections of one synthetic report; returns (sections, last_depth)."""
+    report_no = well_index * n_days + day_index + 1  # report_no is unique across wells
+    report_date = start_date + timedelta(days=day_index)
+    profile = {
+        'date': report_date.isoformat(),
+        'operator': 'LOADTEST OPERATOR',
+        'contractor': 'LOADTEST DRILLING',
+        'report_no': report_no,
+        'well_pad_name': well_pad_name(well_index),
+        'field': 'LOADTEST FIELD',
+        'well_type_profile': 'DEVELOPMENT / DIRECTIONAL',
+        'latitude_longitude': '-1.234 / 116.789',
+        'environment': 'LAND',
+        'gl_msl_m': 12.5,
+    }
+
+    step = 24.0 / activities
+    time_breakdown = []
+    for activity in range(activities):
+        npt = rng.random() < 0.15
+        if not npt:
+            depth += rng.uniform(0, 12)
+        time_breakdown.append({
+            'start': round(activity * step, 2),
+            'end': round((activity + 1) * step, 2),
+            'elapsed': round(step, 2),
+            'depth': round(depth, 1),
+            'pt_npt': 'NPT' if npt else 'PT',
+            'code': rng.choice(NPT_CODES if npt else PT_CODES),
+            'description': rng.choice(DESCRIPTIONS),
+            'operation': 'DRILLING',
+        })
+
+    general = {
+        'rig_type_name': 'LAND RIG / LOADTEST-01',
+        'rig_power': '1500 HP',
+        'kb_elevation': '12.5',
+        'midnight_depth': f'{depth:,.1f}',
+        'progress': f'{time_breakdown[-1]["depth"] - time_breakdown[0]["depth"]:.1f}',
+        'proposed_td': '3,500.0',
+        'spud_date': start_date.strftime('%d-%b-%y'),
+        'release_date': '',
+        'planned_days': str(n_days),
+        'days_from_rig_release': str(day_index + 1),
+    }
+    drilling_parameter = {
+        'average_wob_24_hrs': '25',
+        'average_rop_24_hrs': f'{rng.uniform(5, 30):.1f}',
+        'average_surface_rpm_dhm': '120 / 80',
+        'on_off_bottom_torque': '5,000 / 3,000',
+        'flowrate_spp': '600 / 1,500',
+        'air_rate': '0',
+        'corr_inhib_foam_rate': '0 / 0',
+        'puw_sow_rotw': '150 / 120 / 135',
+        'total_drilling_time': '10.5',
+        'ton_miles': '45.2',
+    }
+    afe = {
+        'afe_number_afe_cost': 'AFE-001 / USD 5,000,000.00',
+        'daily_cost': f'USD {rng.uniform(50_000, 150_000):,.2f}',
+        'percent_afe_cumulative_cost': f'{day_index * 3}% / USD {day_index * 100_000:,.2f}',
+        'daily_mud_cost': 'USD 8,500.00',
+        'cumulative_mud_cost': f'USD {(day_index + 1) * 8_500:,.2f}',
+    }
+    personnel_in_charge = {
+        'day_night_drilling_supv': 'A. SUPERVISOR / B. SUPERVISOR',
+        'drilling_superintendent': 'C. SUPERINTENDENT',
+        'rig_superintendent': 'D. SUPERINTENDENT',
+        'drilling_engineer': 'E. ENGINEER',
+        'hse_supervisor': 'F. SUPERVISOR',
+    }
+    summary = {
+        'hours_24_summary': 'Drilled ahead with no incidents.',
+        'hours_24_forecast': 'Continue drilling.',
+        'status': 'DRILLING',
+    }
+    sections = (profile, general, drilling_parameter, afe, personnel_in_charge, summary, time_breakdown)
+    return sections, depth
+
+
+def seed(wells, days, activities=24, start_date=date(2024, 1, 1), batch_size=100, seed=0, progress=None):
+    """
+    Store `wells` x `days` synthetic reports. Must be called inside an
+    application context. Returns the number of reports stored.
+    """
+    rng = random.Random(seed)
+    reports = []
+    stored = 0
+
+    def flush():
+        nonlocal stored
+        messages = save_reports(reports)
+        failed = [message for message in messages if message.startswith('Failed')]
+        if failed:
+            raise RuntimeError(f'Seeding failed: {failed[0]}')
+        stored += len(reports)
+        reports.clear()
+        if progress:
+            progress(stored)
+
+    for well_index in range(wells):
+        depth = rng.uniform(100, 500)
+        for day_index in range(days):
+            sections, depth = make_sections(well_index, day_index, start_date, activities, depth, rng, days)
+            reports.append({'sections': sections})
+            if len(reports) >= batch_size:
+                flush()
+    if reports:
+        flush()
+    return stored
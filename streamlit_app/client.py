@@ -0,0 +1,151 @@
+import time
+import uuid
+from collections import OrderedDict
+
+import requests
+
+FINISHED_STATUSES = ("done", "failed")
+
+# Attempts per chunk before giving up on a flaky connection
+CHUNK_RETRIES = 5
+
+# Responses kept for conditional requests, most recently used last
+ETAG_CACHE_SIZE = 64
+_etag_cache = OrderedDict()
+
+
+def conditional_get(url, params=None, headers=None):
+    """
+    GET that revalidates earlier responses with their ETag.
+
+    When the backend answers 304 Not Modified, the stored response is returned
+    instead, so unchanged data is neither re-sent nor re-encoded.
+    """
+    key = (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+    cached = _etag_cache.get(key)
+    request_headers = dict(headers or {})
+    if cached is not None:
+        request_headers["If-None-Match"] = cached.headers["ETag"]
+
+    response = requests.get(url, params=params, headers=request_headers)
+    if response.status_code == 304 and cached is not None:
+        _etag_cache.move_to_end(key)
+        return cached
+
+    if response.status_code == 200 and "ETag" in response.headers:
+        _etag_cache[key] = response
+        _etag_cache.move_to_end(key)
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return response
+
+
+def new_batch_id():
+    return uuid.uuid4().hex
+
+
+def upload_file_chunked(api_url, file, batch_id, resume_state=None, revise=False):
+    """
+    Upload one PDF through the resumable /uploads API.
+
+    Parameters:
+    - api_url: Base URL of the backend.
+    - file: A seekable file object with `name` and `size`, such as a Streamlit UploadedFile.
+    - batch_id: Groups the queued job with the other files of the same upload.
+    - resume_state: Optional dict kept across calls (e.g. st.session_state) mapping
+      files to their upload id, so an interrupted upload resumes instead of restarting.
+    - revise: Replace an already stored report with this revised version.
+
+    Returns:
+    - The per-file result returned by /uploads/<id>/complete.
+    """
+    resume_state = resume_state if resume_state is not None else {}
+    key = f"{file.name}:{file.size}"
+
+    state = None
+    upload_id = resume_state.get(key)
+    if upload_id:
+        response = requests.get(f"{api_url}/uploads/{upload_id}")
+        if response.status_code == 200:
+            state = response.json()
+
+    if state is None:
+        response = requests.post(f"{api_url}/uploads", json={"filename": file.name, "size": file.size})
+        if response.status_code != 201:
+            return {"filename": file.name, "status": "failed", "message": response.json().get("message")}
+        state = response.json()
+        resume_state[key] = state["upload_id"]
+
+    upload_id = state["upload_id"]
+    offset = state["offset"]
+    attempts = 0
+    while offset < file.size:
+        file.seek(offset)
+        chunk = file.read(state["chunk_size"])
+        try:
+            response = requests.put(
+                f"{api_url}/uploads/{upload_id}",
+                params={"offset": offset},
+                data=chunk,
+                headers={"Content-Type": "application/octet-stream"},
+            )
+        except requests.exceptions.RequestException:
+            response = None
+
+        if response is not None and response.status_code in (200, 409):
+            # 409 means the server holds a different offset; continue from there
+            offset = response.json()["offset"]
+            attempts = 0
+            continue
+
+        if response is not None and response.status_code < 500:
+            return {"filename": file.name, "status": "failed", "message": response.json().get("message")}
+
+        attempts += 1
+        if attempts >= CHUNK_RETRIES:
+            return {"filename": file.name, "status": "failed", "message": "Upload interrupted, retry to resume"}
+        time.sleep(2 ** attempts)
+        try:
+            status = requests.get(f"{api_url}/uploads/{upload_id}")
+            if status.status_code == 200:
+                offset = status.json()["offset"]
+        except requests.exceptions.RequestException:
+            pass
+
+    response = requests.post(
+        f"{api_url}/uploads/{upload_id}/complete", json={"batch_id": batch_id, "revise": revise}
+    )
+    resume_state.pop(key, None)
+    if response.status_code not in (200, 202):
+        return {"filename": file.name, "status": "failed", "message": response.json().get("message")}
+    return response.json()
+
+
+def wait_for_batch(api_url, batch_id, results, poll_interval=1.0, timeout=600):
+    """
+    Poll /batches/<batch_id> until every ingestion job has finished.
+
+    Parameters:
+    - api_url: Base URL of the backend.
+    - batch_id: Batch id of the upload.
+    - results: Per-file results returned when the files were uploaded, used until the first poll succeeds.
+
+    Returns:
+    - The latest per-file results. Jobs still running when the timeout expires keep their last status.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(result.get("status") in FINISHED_STATUSES for result in results):
+            break
+
+        time.sleep(poll_interval)
+        response = requests.get(f"{api_url}/batches/{batch_id}")
+        if response.status_code != 200:
+            break
+
+        # Keep rejected files (they never became jobs) alongside the job statuses
+        jobs = response.json().get("results", [])
+        rejected = [result for result in results if "job_id" not in result]
+        results = rejected + jobs
+
+    return results
@@ -3,15 +3,16 @@ import streamlit as st
 import requests
 import pandas as pd
 import plotly.graph_objects as go
+from client import conditional_get, new_batch_id, upload_file_chunked, wait_for_batch
 from dotenv import load_dotenv
 load_dotenv()
 
 API_URL = os.getenv("API_URL")
 
-def fetch_data(url):
+def fetch_data(url, params=None):
     """Fetch data from the API endpoint."""
     try:
-        response = requests.get(url)
+        response = conditional_get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             if data:
@@ -29,12 +30,15 @@ def fetch_data(url):
         st.error(f"Error fetching data: {str(e)}")
         return pd.DataFrame()
 
-def fetch_detail_data(url):
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_detail_data(url, well_pad_name, date):
     """
-    Fetch detailed data and time breakdown data from the /detail endpoint.
+    Fetch the detail and time breakdown of one well pad's reports on one date.
 
     Parameters:
     - url: The URL of the /detail endpoint.
+    - well_pad_name: The selected well pad.
+    - date: The selected date (datetime.date).
 
     Returns:
     - A tuple containing:
@@ -42,7 +46,7 @@ def fetch_detail_data(url):
         - time: A list of dictionaries with time breakdown data.
     """
     try:
-        response = requests.get(url)
+        response = requests.get(url, params={"well_pad_name": well_pad_name, "date": date.isoformat()})
         if response.status_code == 200:
             detail_time_data = response.json()
             detail = detail_time_data.get("detail", [])
@@ -55,41 +59,51 @@ def fetch_detail_data(url):
         st.error(f"Error fetching detail and time data: {str(e)}")
         return [], []
 
-def preprocess_data(df):
-    """Preprocess data for visualization."""
-    if df.empty:
-        return pd.DataFrame()
-
-    min_date = df['date'].min()
-    max_date = df['date'].max()
-    complete_dates = pd.date_range(start=min_date, end=max_date)
-
-    missing_dates = complete_dates.difference(df['date'])
-    missing_data = pd.DataFrame({'date': missing_dates})
+def fetch_analytics(url, filtered_days, **params):
+    """
+    Fetch an /analytics endpoint for the selected well pad and date range.
 
-    for col in df.columns:
-        if col == 'start':
-            missing_data[col] = 0
-        elif col == 'end':
-            missing_data[col] = 0
-        elif col != 'date':
-            missing_data[col] = None
+    Parameters:
+    - url: The URL of the /analytics endpoint.
+    - filtered_days: The daily progress rows left after the sidebar filters.
+    - params: Extra query parameters, such as period.
+    """
+    if filtered_days.empty:
+        return pd.DataFrame()
 
-    df = pd.concat([df, missing_data], ignore_index=True)
-    df['start'] = pd.to_numeric(df.get('start', 0), errors='coerce').fillna(0)
-    df['end'] = pd.to_numeric(df.get('end', 0), errors='coerce').fillna(0)
+    params.update({
+        "well_pad_name": filtered_days['well_pad_name'].iloc[0],
+        "date_from": filtered_days['date'].min().strftime("%Y-%m-%d"),
+        "date_to": filtered_days['date'].max().strftime("%Y-%m-%d"),
+    })
+    return fetch_data(url, params)
 
-    df['start_time'] = df['date'] + pd.to_timedelta(df['start'], unit='h')
-    df['end_time'] = df['date'] + pd.to_timedelta(df['end'], unit='h')
+def fetch_catalog(url):
+    """The /catalog of well pads and their date ranges, or None when unreachable."""
+    try:
+        response = conditional_get(url)
+        if response.status_code == 200:
+            return response.json()
+        st.error("Failed to connect to the database.")
+    except Exception as e:
+        st.error(f"Error checking database: {str(e)}")
+    return None
 
-    df = df.sort_values(by='start_time').reset_index(drop=True)
-    return df
+def apply_filters(catalog):
+    """
+    Apply sidebar filters built from the catalog.
 
-def apply_filters(df):
-    """Apply sidebar filters to the data."""
+    Returns the selected well pad and date range as (well_pad_name, start_date,
+    end_date), or None when there is nothing to select, and the progress type.
+    """
     st.sidebar.header("Filters")
-    drilling_progress_type = st.sidebar.selectbox("Select Drilling Progress Type", ["Detailed Progress", "Daily Overview"])
-    unique_well_pad_names = df['well_pad_name'].unique() if 'well_pad_name' in df.columns else []
+    drilling_progress_type = st.sidebar.selectbox("Select Drilling Progress Type", ["Detailed Progress", "Daily Overview", "Time Analysis"])
+    well_pads = {
+        well_pad['well_pad_name']: well_pad
+        for well_pad in (catalog or {}).get('well_pads', [])
+        if well_pad['date_min'] and well_pad['date_max']
+    }
+    unique_well_pad_names = list(well_pads)
 
     alphabet_labels = [chr(65 + i) for i in range(len(unique_well_pad_names))]  # 65 is ASCII for 'A'
     well_pad_mapping = {name: label for name, label in zip(unique_well_pad_names, alphabet_labels)}
@@ -102,55 +116,67 @@ def apply_filters(df):
 
     # Reverse the mapping to get the actual well_pad_name from the selected label
     selected_well_pad_name = {v: k for k, v in well_pad_mapping.items()}.get(selected_label)
+    if selected_well_pad_name is None:
+        return None, drilling_progress_type
+
+    start_date = pd.to_datetime(well_pads[selected_well_pad_name]['date_min']).date()
+    end_date = pd.to_datetime(well_pads[selected_well_pad_name]['date_max']).date()
+    date_range = st.sidebar.date_input("Select Date Range",
+                                       value=(start_date, end_date),
+                                       min_value=start_date,
+                                       max_value=end_date)
+    if date_range and len(date_range) == 2:
+        start_date, end_date = date_range
+
+    return (selected_well_pad_name, start_date, end_date), drilling_progress_type
+
+def fetch_selected_days(url, selection):
+    """The daily progress rows of the selected well pad and date range."""
+    if selection is None:
+        return pd.DataFrame()
 
-    if not df.empty and selected_well_pad_name != "No data available":
-        filtered_data = df[df['well_pad_name'] == selected_well_pad_name]
-    else:
-        filtered_data = pd.DataFrame()
-
-    if not filtered_data.empty:
-        start_date, end_date = filtered_data['date'].min(), filtered_data['date'].max()
-        date_range = st.sidebar.date_input("Select Date Range",
-                                           value=(start_date.date(), end_date.date()),
-                                           min_value=start_date,
-                                           max_value=end_date)
-        if date_range and len(date_range) == 2:
-            start_date, end_date = date_range
-            filtered_data = filtered_data[
-                (filtered_data['date'] >= pd.to_datetime(start_date)) &
-                (filtered_data['date'] <= pd.to_datetime(end_date))
-            ]
-
-    return filtered_data, drilling_progress_type
-
-def handle_file_upload(url):
+    well_pad_name, start_date, end_date = selection
+    return fetch_data(url, {
+        "well_pad_name": well_pad_name,
+        "date_from": start_date.strftime("%Y-%m-%d"),
+        "date_to": end_date.strftime("%Y-%m-%d"),
+    })
+
+def handle_file_upload(api_url):
     """Handle file uploads via Streamlit."""
     st.sidebar.header("Report Upload")
     uploaded_files = st.sidebar.file_uploader("Upload Drilling Reports (PDFs)", type="pdf", accept_multiple_files=True)
+    revise = st.sidebar.checkbox("Replace existing reports with revised versions")
     if uploaded_files:
         try:
-            files = [('files', (file.name, file, 'application/pdf')) for file in uploaded_files]
-            response = requests.post(url, files=files)
-            if response.status_code == 207:  # Multi-Status response
-                results = response.json().get("results", [])
-                for result in results:
-                    message = result.get("message", "No message provided")
-                    if "successfully" in message.lower():
-                        st.sidebar.success(f"{message}")
-                    else:
-                        st.sidebar.error(f"{message}")
-            else:
-                st.sidebar.error(response.json().get("message", "Failed to upload files"))
+            # Each file is sent in resumable chunks; an interrupted file resumes on the next run
+            batch_id = new_batch_id()
+            resume_state = st.session_state.setdefault("chunked_uploads", {})
+            with st.sidebar, st.spinner("Uploading reports..."):
+                results = [
+                    upload_file_chunked(api_url, file, batch_id, resume_state, revise)
+                    for file in uploaded_files
+                ]
+
+            with st.sidebar, st.spinner("Processing reports..."):
+                results = wait_for_batch(api_url, batch_id, results)
+            for result in results:
+                message = result.get("message", "No message provided")
+                if "successfully" in message.lower():
+                    st.sidebar.success(f"{message}")
+                else:
+                    st.sidebar.error(f"{message}")
         except requests.exceptions.RequestException as e:
             st.sidebar.error(f"Upload error: {str(e)}")
 
-def visualize_detail_report(detail, time, filtered_data):
+def visualize_detail_report(url, filtered_data):
     """
     Display details using an expander and filter based on a date selection.
-    
+
+    The report of a date is only fetched once the user picks that date.
+
     Parameters:
-    - detail: List of dictionaries containing detailed report data.
-    - time: List of dictionaries containing time breakdown data.
+    - url: The URL of the /detail endpoint.
     - filtered_data: DataFrame containing the filtered data to extract unique dates.
     """
     if filtered_data.empty:
@@ -164,18 +190,17 @@ def visualize_detail_report(detail, time, filtered_data):
     # Create an expander for date selection and display details
     with st.expander("View Details"):
         # Create the selectbox with formatted dates
-        selected_formatted_date = st.selectbox("Select Date", options=formatted_dates)
+        selected_formatted_date = st.selectbox(
+            "Select Date", options=formatted_dates, index=None, placeholder="Choose a date"
+        )
 
         # Map back to the raw date
-        selected_date = date_mapping[selected_formatted_date]
+        selected_date = date_mapping.get(selected_formatted_date)
 
         if selected_date:
-            # Match the id of the selected date with details and time
-            filtered_ids = filtered_data[filtered_data['date'].dt.date == selected_date]['profile_id'].unique()
-
-            # Filter detail and time data based on matched IDs
-            filtered_detail = [item for item in detail if item['id'] in filtered_ids]
-            filtered_time = [item for item in time if item['profile_id'] in filtered_ids]
+            # Fetch only the reports of the selected well pad and date
+            well_pad_name = filtered_data['well_pad_name'].iloc[0]
+            filtered_detail, filtered_time = fetch_detail_data(url, well_pad_name, selected_date)
 
             st.subheader("Report Details")
             if filtered_detail:
@@ -267,15 +292,22 @@ def visualize_detail_report(detail, time, filtered_data):
                 st.info("No time breakdown available for the selected date.")
 
 
-def visualize_by_drilling_progress_type(df, drilling_progress_type):
-    """Generate visualizations for Daily and Weekly time frames."""
-    if df.empty:
+def visualize_by_drilling_progress_type(api_url, filtered_days, drilling_progress_type):
+    """
+    Generate visualizations for the selected well pad and date range.
+
+    The data comes pre-aggregated from the /analytics endpoints.
+    """
+    if filtered_days.empty:
         st.warning("No data available for visualization.")
         return
 
-    df = preprocess_data(df)  # Ensure data is preprocessed
-
     if drilling_progress_type == 'Detailed Progress':
+        df = fetch_analytics(f"{api_url}/analytics/depth_curve", filtered_days)
+        if df.empty:
+            return
+        df['start_time'] = pd.to_datetime(df['time'])
+
         # Daily visualization: line chart with start_time as x-axis
         x_axis = df['start_time']
 
@@ -326,14 +358,14 @@ def visualize_by_drilling_progress_type(df, drilling_progress_type):
         st.plotly_chart(fig)
 
     elif drilling_progress_type == 'Daily Overview':
-        # Weekly visualization: bar chart with max depth per day
-        if 'date' in df.columns and 'depth' in df.columns:
-            weekly_data = (
-                df.groupby(df['date'].dt.date)['depth']
-                .agg(lambda x: (x.iloc[-1] - x.iloc[0]) if len(x) > 1 else 0)  # Calculate depth difference, handle NaN gracefully
-                .reset_index()
-                .rename(columns={'depth': 'depth_difference'})
-            )
+        daily_progress = fetch_analytics(f"{api_url}/analytics/daily_progress", filtered_days)
+        if not daily_progress.empty:
+            daily_progress = daily_progress.rename(columns={'progress': 'depth_difference'})
+
+        # Weekly visualization: bar chart with the depth progress per day
+        if not daily_progress.empty:
+            weekly_data = daily_progress.copy()
+            weekly_data['date'] = weekly_data['date'].dt.date
             weekly_data['depth_difference'] = weekly_data['depth_difference'].fillna(0)
             weekly_data['label'] = weekly_data['depth_difference'].apply(
                 lambda x: "No Progress" if x == 0 else int(x)
@@ -367,10 +399,53 @@ def visualize_by_drilling_progress_type(df, drilling_progress_type):
             )
             st.plotly_chart(fig)
         else:
-            st.warning("Required columns ('date' and 'depth') are missing for weekly visualization.")
+            st.warning("No daily progress available for the selected well pad.")
 
+    elif drilling_progress_type == 'Time Analysis':
+        visualize_time_analysis(api_url, filtered_days)
 
-def app():
+
+def visualize_time_analysis(api_url, filtered_days):
+    """PT vs NPT hours and NPT hours by code, per day or week."""
+    period = st.radio("Group by", ["day", "week"], horizontal=True, format_func=str.capitalize)
+
+    hours = fetch_analytics(f"{api_url}/analytics/pt_npt_hours", filtered_days, period=period)
+    if not hours.empty:
+        hours['category'] = hours['category'].fillna("Unspecified")
+        fig = go.Figure()
+        for category, colour in (("PT", '#c35817'), ("NPT", '#ffcc00'), ("Unspecified", '#b0b0b0')):
+            rows = hours[hours['category'] == category]
+            if not rows.empty:
+                fig.add_trace(go.Bar(x=rows['period_start'], y=rows['hours'], name=category, marker=dict(color=colour)))
+        fig.update_layout(
+            title="Productive vs Non-Productive Time",
+            barmode='stack',
+            xaxis_title="Date" if period == "day" else "Week",
+            yaxis_title="Hours",
+            height=515
+        )
+        st.plotly_chart(fig)
+
+    npt = fetch_analytics(f"{api_url}/analytics/npt_by_code", filtered_days, period=period)
+    if not npt.empty:
+        npt['code'] = npt['code'].fillna("No code")
+        fig = go.Figure()
+        for code, rows in npt.groupby('code'):
+            fig.add_trace(go.Bar(x=rows['period_start'], y=rows['hours'], name=code))
+        fig.update_layout(
+            title="Non-Productive Time by Code",
+            barmode='stack',
+            xaxis_title="Date" if period == "day" else "Week",
+            yaxis_title="Hours",
+            legend_title="Code",
+            height=515
+        )
+        st.plotly_chart(fig)
+    else:
+        st.info("No non-productive time recorded for the selection.")
+
+
+def app(catalog=None):
     st.markdown("""
         <style>
             /* Sidebar container background */
@@ -407,25 +482,24 @@ def app():
     """, unsafe_allow_html=True)
     
     """Main app function to render the dashboard."""
-    URL_UPLOAD = f"{API_URL}/upload"
-    URL_TIMEBREAKDOWN = f"{API_URL}/time_breakdown"
     URL_DETAIL = f"{API_URL}/detail"
+    URL_DAILY_PROGRESS = f"{API_URL}/daily_progress"
 
-    # Fetch and preprocess data
-    df = fetch_data(URL_TIMEBREAKDOWN)
+    # The catalog lists the well pads and their date ranges for the filters
+    if catalog is None:
+        catalog = fetch_catalog(f"{API_URL}/catalog")
 
-    # Apply filters
-    filtered_data, drilling_progress_type = apply_filters(df)
+    # Apply filters, then fetch only the days of the selection
+    selection, drilling_progress_type = apply_filters(catalog)
+    filtered_days = fetch_selected_days(URL_DAILY_PROGRESS, selection)
 
     # Handle file upload
-    handle_file_upload(URL_UPLOAD)
+    handle_file_upload(API_URL)
 
     # Dashboard Title
     st.title("Drilling Operations Dashboard")
 
     # Render Visualization
-    visualize_by_drilling_progress_type(filtered_data, drilling_progress_type)
-
-    detail, time = fetch_detail_data(URL_DETAIL)
+    visualize_by_drilling_progress_type(API_URL, filtered_days, drilling_progress_type)
 
-    visualize_detail_report(detail, time, filtered_data)
+    visualize_detail_report(URL_DETAIL, filtered_days)
@@ -1,11 +1,11 @@
 import os
 import streamlit as st
 import requests
+from client import new_batch_id, upload_file_chunked, wait_for_batch
 from dotenv import load_dotenv
 load_dotenv()
 
 API_URL = os.getenv("API_URL")
-URL_UPLOAD = f"{API_URL}/upload"
 
 def app():
     st.markdown("""
@@ -33,25 +33,23 @@ def app():
 
     if uploaded_files:
         try:
-            files = [
-                ('files', (file.name, file, 'application/pdf')) for file in uploaded_files
-            ]
-
-            response = requests.post(url=URL_UPLOAD, files=files)
-
-            if response.status_code == 207:  # Multi-Status response
-                results = response.json().get("results", [])
-                for result in results:
-                    filename = result.get("filename", "Unknown File")
-                    message = result.get("message", "No message provided")
-                    if "successfully" in message.lower():
-                        st.success(f"{message}")
-                    else:
-                        st.error(f"{message}")
-            else:
-                st.error(
-                    response.json().get("message", "Failed to upload files")
-                )
+            # Each file is sent in resumable chunks; an interrupted file resumes on the next run
+            batch_id = new_batch_id()
+            resume_state = st.session_state.setdefault("chunked_uploads", {})
+            with st.spinner("Uploading reports..."):
+                results = [
+                    upload_file_chunked(API_URL, file, batch_id, resume_state) for file in uploaded_files
+                ]
+
+            with st.spinner("Processing reports..."):
+                results = wait_for_batch(API_URL, batch_id, results)
+            for result in results:
+                filename = result.get("filename", "Unknown File")
+                message = result.get("message", "No message provided")
+                if "successfully" in message.lower():
+                    st.success(f"{message}")
+                else:
+                    st.error(f"{message}")
 
         except requests.exceptions.RequestException as e:
             st.error(f"Upload error: {str(e)}")
\ No newline at end of file